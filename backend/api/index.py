@@ -4,7 +4,8 @@ import os
 # Add the parent directory (backend/) to sys.path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from main import app
-
 # Vercel needs a handler for WSGI/ASGI apps.
-# For FastAPI, the 'app' object is sufficient.
+# For FastAPI, the 'app' object is sufficient. Keep this entry point light:
+# heavy SDKs (OpenAI, LangChain, MinIO, numpy) load on first use, and the schema
+# is migrated at deploy time (`python -m app.db.migrate`), not on cold start.
+from main import app
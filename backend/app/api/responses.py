@@ -0,0 +1,30 @@
+from typing import Any, Tuple
+
+import orjson
+from fastapi.responses import JSONResponse
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON rendered by orjson, which handles datetimes natively and is several
+    times faster than the stdlib encoder. Route handlers on hot paths return it
+    directly with plain dicts, which also skips FastAPI's jsonable_encoder pass.
+    """
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+class SelectiveGZipMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware that leaves some paths alone: audio is already compressed and
+    served with byte ranges, and an SSE stream must not sit in the gzip buffer.
+    """
+    def __init__(self, app: ASGIApp, exclude_paths: Tuple[str, ...] = (), **kwargs):
+        super().__init__(app, **kwargs)
+        self.exclude_paths = exclude_paths
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "http" and scope["path"].startswith(self.exclude_paths):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
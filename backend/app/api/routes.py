@@ -1,23 +1,61 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query, Request, Response
 from fastapi.responses import StreamingResponse
 from app.core.config import settings
-from app.db.storage import db
-from app.inngest_client import inngest_client
+from app.core.metrics import track_stage, VOICEMAILS_INGESTED
+from app.api.responses import FastJSONResponse
+from app.db.storage import async_db
+from app.models.voicemail import VoicemailMetadata, ListSort, Status, Urgency, utcnow
+from app.models.upload import DirectUploadRequest, UploadPartsRequest, CompleteUploadRequest
+from app.services.events import voicemail_events
+from app.services.object_storage import object_storage, HashingReader
+from app.services.transcript_cache import transcript_cache
+from app.services.intelligence import intelligence_service
+from app.services.ingest import expand_uploads, bulk_ingest
+from app.services import direct_upload
+from app.services.dispatch import dispatcher
 import inngest
 import uuid
 import uuid as uuid_lib
-from minio import Minio
 from datetime import datetime
+from typing import List, Optional, Tuple
+import hashlib
+import hmac
 
 router = APIRouter()
 
-# MinIO Client (for Uploads)
-minio_client = Minio(
-    settings.MINIO_ENDPOINT,
-    access_key=settings.MINIO_ACCESS_KEY,
-    secret_key=settings.MINIO_SECRET_KEY,
-    secure=settings.MINIO_USE_SSL
-)
+async def _list_etag(request: Request) -> str:
+    # Weak validator: latest write across the table + the exact query being asked
+    version = await async_db.get_version() or ""
+    digest = hashlib.sha1(f"{version}|{request.url.query}".encode()).hexdigest()
+    return f'W/"{digest}"'
+
+def _not_modified(request: Request, etag: str) -> bool:
+    return etag in request.headers.get("if-none-match", "")
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parses a single `bytes=` range into inclusive (start, end) offsets.
+    Returns None for forms we don't serve partially (multi-range, other units),
+    and raises ValueError when the range is unsatisfiable.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        if not first:
+            # Suffix range: the last N bytes
+            length = int(last)
+            if length <= 0:
+                raise ValueError("Unsatisfiable range")
+            return max(size - length, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except (TypeError, ValueError):
+        raise ValueError("Unsatisfiable range")
+    if start >= size or end < start:
+        raise ValueError("Unsatisfiable range")
+    return start, min(end, size - 1)
 
 @router.post("/voicemails")
 async def create_voicemail(file: UploadFile = File(...)):
@@ -31,24 +69,14 @@ async def create_voicemail(file: UploadFile = File(...)):
         # Log Start
         logger.info(f"Starting upload for {filename}")
 
-        # Ensure bucket exists (Only in Local Dev/MinIO)
-        # In Prod (S3), we assume bucket exists to avoid 'AccessDenied' on ListBuckets
-        if not settings.MINIO_USE_SSL: 
-            if not minio_client.bucket_exists(settings.MINIO_BUCKET):
-                logger.info(f"Bucket {settings.MINIO_BUCKET} not found, creating...")
-                minio_client.make_bucket(settings.MINIO_BUCKET)
-
-        
-        # Stream upload
+        # Stream upload (bucket is ensured once at startup)
         try:
             logger.info("Uploading to Storage...")
-            minio_client.put_object(
-                settings.MINIO_BUCKET, 
-                filename, 
-                file.file, 
-                length=-1, 
-                part_size=10*1024*1024
-            )
+            # Hash while streaming so duplicate audio can reuse a cached transcript
+            reader = HashingReader(file.file)
+            with track_stage("storage_put", pipeline="ingest"):
+                await object_storage.put_object(filename, reader)
+            audio_sha256 = reader.hexdigest()
             logger.info("Upload successful")
         except Exception as e:
             logger.error(f"Storage upload failed: {str(e)}")
@@ -57,16 +85,19 @@ async def create_voicemail(file: UploadFile = File(...)):
         # Initial DB Record
         logger.info("Saving to DB...")
         try:
-            db.save_voicemail({
-                "id": file_id,
-                "status": "PROCESSING",
-                "file_path": filename,
-                "created_at": str(datetime.now()),
-                "transcript": None,
-                "urgency": None,
-                "category": None
-            })
+            with track_stage("db_save", pipeline="ingest"):
+                vm = await async_db.save_voicemail({
+                    "id": file_id,
+                    "status": "PROCESSING",
+                    "file_path": filename,
+                    "created_at": utcnow(),
+                    "transcript": None,
+                    "urgency": None,
+                    "category": None,
+                    "audio_sha256": audio_sha256
+                })
             logger.info("DB Save successful")
+            voicemail_events.publish_voicemail(vm)
         except Exception as e:
             logger.error(f"DB Save failed: {str(e)}")
             raise HTTPException(status_code=500, detail=f"DB Save failed: {str(e)}")
@@ -74,17 +105,19 @@ async def create_voicemail(file: UploadFile = File(...)):
         # Trigger Inngest Event
         logger.info("Sending Inngest Event...")
         try:
-            await inngest_client.send(
-                inngest.Event(
-                    name="voicemail/received", 
-                    data={"file_id": file_id, "file_path": filename}
+            with track_stage("event_send", pipeline="ingest"):
+                await dispatcher.send(
+                    inngest.Event(
+                        name="voicemail/received", 
+                        data={"file_id": file_id, "file_path": filename, "audio_sha256": audio_sha256}
+                    )
                 )
-            )
             logger.info("Inngest Event sent")
         except Exception as e:
-            logger.error(f"Inngest send failed: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Inngest send failed: {str(e)}")
+            logger.error(f"Event send failed: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Event send failed: {str(e)}")
         
+        VOICEMAILS_INGESTED.labels("upload").inc()
         return {"id": file_id, "status": "queued"}
 
     except HTTPException as he:
@@ -93,39 +126,293 @@ async def create_voicemail(file: UploadFile = File(...)):
         logger.error(f"Unexpected error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
 
-@router.get("/voicemails/audio/{file_path}")
-async def get_voicemail_audio(file_path: str):
+@router.post("/voicemails/bulk")
+async def create_voicemails_bulk(files: List[UploadFile] = File(...)):
+    """
+    Bulk ingestion for archive migrations: accepts many audio files and/or zip archives.
+    Returns a per-item result; failed items don't fail the rest of the batch.
+    """
+    sources, failures = expand_uploads(files)
+    if not sources and not failures:
+        raise HTTPException(status_code=400, detail="No audio files found")
+
+    try:
+        results = await bulk_ingest(sources)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Bulk ingestion failed: {str(e)}")
+
+    items = [
+        {key: value for key, value in result.items() if key in ("filename", "id", "status", "error")}
+        for result in results
+    ] + failures
+    queued = sum(1 for item in items if item["status"] == "queued")
+    return {"queued": queued, "failed": len(items) - queued, "items": items}
+
+@router.post("/voicemails/uploads")
+async def create_direct_upload(body: DirectUploadRequest):
+    """
+    Direct-to-storage upload, step 1: presigned URL(s) the client PUTs the audio to.
+    Files above DIRECT_UPLOAD_PART_SIZE get a multipart upload with one URL per part;
+    each part PUT returns an ETag the client keeps for the completion call.
+    """
+    try:
+        return await direct_upload.start_upload(body.filename, body.size, body.content_type)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Upload init failed: {str(e)}")
+
+@router.post("/voicemails/uploads/{vm_id}/parts")
+async def resume_direct_upload(vm_id: str, body: UploadPartsRequest):
+    """
+    Resumes an interrupted multipart upload: lists the parts storage already has
+    and presigns fresh URLs for the missing (or requested) ones.
+    """
+    try:
+        return await direct_upload.resume_upload(vm_id, body.key, body.upload_id, body.part_numbers, body.size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Listing parts failed: {str(e)}")
+
+@router.post("/voicemails/uploads/{vm_id}/complete")
+async def complete_direct_upload(vm_id: str, body: CompleteUploadRequest):
+    """
+    Direct-to-storage upload, step 2: assembles the parts (multipart only),
+    creates the voicemail and queues it. Repeating the call is harmless.
+    """
+    parts = [(part.part_number, part.etag) for part in body.parts] if body.parts else None
+    try:
+        vm = await direct_upload.complete_upload(vm_id, body.key, body.upload_id, parts)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Upload completion failed: {str(e)}")
+    return {"id": vm.id, "status": "queued" if vm.status == "PROCESSING" else vm.status.lower()}
+
+@router.post("/storage/events")
+async def storage_events(request: Request):
+    """
+    Bucket notification webhook (MinIO `notify_webhook` or an S3 -> HTTP bridge):
+    registers direct uploads even when the client never calls complete.
+    Disabled unless STORAGE_WEBHOOK_TOKEN is set.
+    """
+    if not settings.STORAGE_WEBHOOK_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    # MinIO sends its auth_token as "Bearer <token>"
+    token = request.headers.get("authorization", "").removeprefix("Bearer ").strip()
+    if not hmac.compare_digest(token.encode(), settings.STORAGE_WEBHOOK_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid token")
+
+    try:
+        payload = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON")
+    try:
+        created = await direct_upload.handle_storage_event(payload)
+    except Exception as e:
+        # Non-2xx makes MinIO queue and redeliver the event
+        raise HTTPException(status_code=500, detail=f"Event handling failed: {str(e)}")
+    return {"created": created}
+
+# `path`: direct uploads are keyed under incoming/
+@router.get("/voicemails/audio/{file_path:path}")
+async def get_voicemail_audio(file_path: str, request: Request):
+    try:
+        stat = await object_storage.stat_object(file_path)
+    except Exception as e:
+        raise HTTPException(status_code=404, detail="Audio file not found")
+
+    # Audio is keyed by UUID and never rewritten, so it can be cached forever
+    etag = f'"{stat.etag}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "public, max-age=31536000, immutable",
+    }
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    range_header = request.headers.get("range")
+    # A stale If-Range means the client's partial copy is outdated: send the whole file
+    if range_header and request.headers.get("if-range", etag) == etag:
+        try:
+            byte_range = _parse_range(range_header, stat.size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{stat.size}"})
+
     try:
         # Get object from MinIO
-        response = minio_client.get_object(settings.MINIO_BUCKET, file_path)
-        
-        # Generator to stream the file content
-        def iterfile():
-            try:
-                for chunk in response.stream(1024*1024):
-                    yield chunk
-            finally:
-                response.close()
-                response.release_conn()
-
-        return StreamingResponse(iterfile(), media_type="audio/wav")
+        if byte_range:
+            start, end = byte_range
+            response = await object_storage.get_object(file_path, offset=start, length=end - start + 1)
+            headers["Content-Range"] = f"bytes {start}-{end}/{stat.size}"
+            headers["Content-Length"] = str(end - start + 1)
+            status_code = 206
+        else:
+            response = await object_storage.get_object(file_path)
+            headers["Content-Length"] = str(stat.size)
+            status_code = 200
     except Exception as e:
         raise HTTPException(status_code=404, detail="Audio file not found")
 
+    # Bulk imports keep their original container, so serve the stored content type
+    return StreamingResponse(object_storage.stream(response), status_code=status_code, media_type=stat.content_type or "audio/wav", headers=headers)
+
+@router.post("/voicemails/{vm_id}/retriage")
+async def retriage_voicemail(vm_id: str):
+    """
+    Re-runs analysis for a voicemail with a fresh LLM call (cached analysis is bypassed).
+    """
+    vm = await async_db.get_voicemail(vm_id)
+    if not vm:
+        raise HTTPException(status_code=404, detail="Voicemail not found")
+
+    vm = await async_db.update_voicemail(vm_id, {"status": "PROCESSING"})
+    voicemail_events.publish_voicemail(vm)
+    try:
+        await dispatcher.send(
+            inngest.Event(
+                name="voicemail/received",
+                data={"file_id": vm.id, "file_path": vm.file_path, "audio_sha256": vm.audio_sha256, "retriage": True}
+            )
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Event send failed: {str(e)}")
+    return {"id": vm.id, "status": "queued"}
+
+@router.get("/cache/stats")
+async def cache_stats():
+    return {
+        "transcripts": transcript_cache.stats(),
+        "analysis": intelligence_service.cache.stats(),
+    }
+
+@router.delete("/cache/analysis")
+async def clear_analysis_cache():
+    intelligence_service.clear_cache()
+    return {"status": "cleared"}
+
 @router.get("/init-db")
 async def init_db():
     try:
-        from app.db.session import engine, Base
-        Base.metadata.create_all(bind=engine)
-        return {"status": "success", "message": "Database tables created."}
+        import asyncio
+        from app.db.migrate import upgrade_database
+        await asyncio.to_thread(upgrade_database)
+        return {"status": "success", "message": "Database migrated to the latest schema."}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"DB Init failed: {str(e)}")
 
 @router.get("/voicemails")
-async def list_voicemails():
-    data = db.list_voicemails()
-    # Sort by Urgency (Red first)
-    urgency_map = {"RED": 0, "YELLOW": 1, "GREEN": 2, None: 3}
-    # SQLAlchemy objects use dot notation, not .get()
-    sorted_data = sorted(data, key=lambda x: urgency_map.get(x.urgency, 3))
-    return sorted_data
+async def list_voicemails(
+    request: Request,
+    status: Optional[Status] = None,
+    urgency: Optional[Urgency] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    intent: Optional[str] = None,
+    treatment_mode: Optional[str] = None,
+    sort: ListSort = "priority",
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+):
+    # Unchanged since the client's last poll: skip the page query entirely
+    etag = await _list_etag(request)
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+    # Triage order (Red, awaiting validation, Yellow, Green; newest first within each) unless `sort` says otherwise -- ordering and paging happen in the DB
+    try:
+        items, next_cursor = await async_db.list_voicemails(
+            status=status,
+            urgency=urgency,
+            created_from=created_from,
+            created_to=created_to,
+            cursor=cursor,
+            limit=limit,
+            intent=intent,
+            treatment_mode=treatment_mode,
+            sort=sort,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Summary rows are plain dicts: rendered straight by orjson, no ORM/encoder pass
+    return FastJSONResponse(
+        {"items": items, "next_cursor": next_cursor},
+        headers={"ETag": etag, "Cache-Control": "no-cache"},
+    )
+
+@router.get("/voicemails/changes")
+async def list_voicemail_changes(
+    since: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+):
+    """
+    Change feed: summaries of voicemails created or updated after the `since` cursor.
+    Pass back `next_cursor` on the next call to receive only newer changes.
+
+    updated_at is stamped before the writing transaction commits, so a write can
+    become visible after later-stamped ones were already returned. Each call
+    therefore re-reads CHANGE_FEED_OVERLAP_SECONDS behind the cursor and skips
+    the versions the cursor says were delivered, so such writes still come
+    through once. Missed: a write that takes longer than the overlap to commit,
+    or, in a burst (the cursor remembers at most CHANGE_FEED_MAX_SEEN versions),
+    one stamped before the newest of those. No ETag: the latest updated_at
+    doesn't move for a late write.
+    """
+    try:
+        items, next_cursor = await async_db.list_changes(since=since, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Same summary dicts as the list endpoint, rendered straight by orjson
+    return FastJSONResponse({"items": items, "next_cursor": next_cursor}, headers={"Cache-Control": "no-cache"})
+
+@router.get("/voicemails/search")
+async def search_voicemails(
+    q: str = Query(..., min_length=1, max_length=200),
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+):
+    """
+    Full-text search over transcripts, patient names, summaries and symptoms, best match first.
+    Supports quoted phrases, `or` and `-term` exclusions on Postgres.
+    """
+    try:
+        items, next_cursor = await async_db.search_voicemails(q, cursor=cursor, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FastJSONResponse({"items": items, "next_cursor": next_cursor})
+
+@router.get("/voicemails/stream")
+async def stream_voicemail_events(request: Request):
+    """
+    Server-Sent Events: pushes {id, status, urgency, updated_at} on every status transition.
+    The first `ready` frame carries the change-feed cursor at connect time; after a
+    reconnect, read `/voicemails/changes?since=` from it to catch up on missed events.
+    """
+    async def ready():
+        return {"cursor": await async_db.get_change_head()}
+
+    async def event_stream():
+        async for frame in voicemail_events.subscribe(ready=ready):
+            if await request.is_disconnected():
+                break
+            yield frame
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# Declared after the static /voicemails/* routes so it doesn't shadow them
+@router.get("/voicemails/{vm_id}", response_model=VoicemailMetadata)
+async def get_voicemail(vm_id: str):
+    """
+    Full record for one voicemail (transcript, analysis, audio metrics); the list only returns summaries.
+    """
+    vm = await async_db.get_voicemail(vm_id)
+    if not vm:
+        raise HTTPException(status_code=404, detail="Voicemail not found")
+    return vm
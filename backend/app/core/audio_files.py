@@ -0,0 +1,15 @@
+import os
+
+# Upload extensions accepted as audio (the formats Whisper takes)
+AUDIO_EXTENSIONS = {".wav", ".mp3", ".m4a", ".mp4", ".mpeg", ".mpga", ".ogg", ".oga", ".flac", ".webm"}
+
+def is_audio_file(name: str) -> bool:
+    return os.path.splitext(name)[1].lower() in AUDIO_EXTENSIONS
+
+def audio_extension(name: str) -> str:
+    """
+    Lower-cased extension of an uploaded file name, used for its storage key;
+    anything that isn't a known audio extension is stored as .wav.
+    """
+    extension = os.path.splitext(name)[1].lower()
+    return extension if extension in AUDIO_EXTENSIONS else ".wav"
@@ -12,6 +12,37 @@ class Settings(BaseModel):
     MINIO_SECRET_KEY: str = os.getenv("MINIO_SECRET_KEY", "password123")
     MINIO_BUCKET: str = os.getenv("MINIO_BUCKET", "voicemails")
     MINIO_USE_SSL: bool = os.getenv("MINIO_USE_SSL", "False").lower() == "true"
+    MINIO_POOL_SIZE: int = int(os.getenv("MINIO_POOL_SIZE", "20"))
+    MINIO_CONNECT_TIMEOUT: float = float(os.getenv("MINIO_CONNECT_TIMEOUT", "10"))
+    MINIO_READ_TIMEOUT: float = float(os.getenv("MINIO_READ_TIMEOUT", "300"))
+    STORAGE_MAX_WORKERS: int = int(os.getenv("STORAGE_MAX_WORKERS", "16"))
+    # Address clients use for presigned URLs when the API reaches storage on an
+    # internal host (e.g. http://localhost:9000 vs minio:9000). A scheme sets TLS.
+    MINIO_PUBLIC_ENDPOINT: Optional[str] = os.getenv("MINIO_PUBLIC_ENDPOINT")
+    # Presigning is offline only when the region is known up front
+    MINIO_REGION: str = os.getenv("MINIO_REGION", "us-east-1")
+    
+    # Direct-to-storage uploads: presigned PUT, or presigned multipart parts above one part
+    DIRECT_UPLOAD_URL_EXPIRY_SECONDS: int = int(os.getenv("DIRECT_UPLOAD_URL_EXPIRY_SECONDS", "3600"))
+    DIRECT_UPLOAD_PART_SIZE: int = int(os.getenv("DIRECT_UPLOAD_PART_SIZE", str(8*1024*1024))) # S3 minimum is 5 MiB
+    DIRECT_UPLOAD_MAX_BYTES: int = int(os.getenv("DIRECT_UPLOAD_MAX_BYTES", str(500*1024*1024)))
+    # Bearer token expected on bucket notifications (MinIO webhook `auth_token`); unset disables the webhook
+    STORAGE_WEBHOOK_TOKEN: Optional[str] = os.getenv("STORAGE_WEBHOOK_TOKEN")
+    
+    # Bulk ingestion (archive migrations)
+    BULK_UPLOAD_CONCURRENCY: int = int(os.getenv("BULK_UPLOAD_CONCURRENCY", "16"))
+    BULK_EVENT_BATCH_SIZE: int = int(os.getenv("BULK_EVENT_BATCH_SIZE", "500"))
+    
+    # Database connection pool (per engine, per worker process)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    
+    # How far behind its cursor the change feed re-reads. updated_at is stamped
+    # before the commit, so a write can become visible after later-stamped ones
+    # were read; this must exceed that delay (incl. pool waits) plus clock skew
+    CHANGE_FEED_OVERLAP_SECONDS: float = float(os.getenv("CHANGE_FEED_OVERLAP_SECONDS", "10"))
     
     # Inngest
     INNGEST_BASE_URL: Optional[str] = os.getenv("INNGEST_BASE_URL")
@@ -19,7 +50,48 @@ class Settings(BaseModel):
     INNGEST_SIGNING_KEY: Optional[str] = os.getenv("INNGEST_SIGNING_KEY")
     INNGEST_EVENT_KEY: Optional[str] = os.getenv("INNGEST_EVENT_KEY")
     
+    # Triage mode: "single" (one run + LLM call per voicemail) or "batch"
+    # (Inngest event batching + one multi-item LLM call per batch)
+    TRIAGE_MODE: str = os.getenv("TRIAGE_MODE", "single")
+    TRIAGE_BATCH_MAX_SIZE: int = int(os.getenv("TRIAGE_BATCH_MAX_SIZE", "20"))
+    TRIAGE_BATCH_TIMEOUT_SECONDS: int = int(os.getenv("TRIAGE_BATCH_TIMEOUT_SECONDS", "10"))
+    
+    # Execution backend: "inngest" (external orchestrator) or "embedded"
+    # (in-process asyncio workers with step results persisted to the DB; single node)
+    EXECUTION_BACKEND: str = os.getenv("EXECUTION_BACKEND", "inngest")
+    WORKER_CONCURRENCY: int = int(os.getenv("WORKER_CONCURRENCY", "8"))
+    WORKER_MAX_ATTEMPTS: int = int(os.getenv("WORKER_MAX_ATTEMPTS", "4"))
+    WORKER_RETRY_BACKOFF_SECONDS: float = float(os.getenv("WORKER_RETRY_BACKOFF_SECONDS", "2"))
+    
     # OpenAI
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
+    
+    # LLM backpressure (per process): concurrent calls, pacing and 429 retries
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+    LLM_REQUESTS_PER_MINUTE: float = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "300"))
+    LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "5"))
+    # SDK-level retries stay off: 429s are paced by the limiter, and timeouts,
+    # connection errors and 5xx are raised to the workflow step, which retries them
+    LLM_SDK_MAX_RETRIES: int = int(os.getenv("LLM_SDK_MAX_RETRIES", "0"))
+    
+    # Analysis cache (per process): max entries and time-to-live in seconds
+    ANALYSIS_CACHE_SIZE: int = int(os.getenv("ANALYSIS_CACHE_SIZE", "1024"))
+    ANALYSIS_CACHE_TTL: int = int(os.getenv("ANALYSIS_CACHE_TTL", str(24*60*60)))
+    
+    # Transcription: audio is buffered in memory up to this size, then spills to disk
+    TRANSCRIPTION_SPOOL_MAX_BYTES: int = int(os.getenv("TRANSCRIPTION_SPOOL_MAX_BYTES", str(10*1024*1024)))
+    # Long voicemails are split on silence and transcribed as concurrent segments
+    TRANSCRIPTION_SEGMENT_THRESHOLD_SECONDS: float = float(os.getenv("TRANSCRIPTION_SEGMENT_THRESHOLD_SECONDS", "90"))
+    TRANSCRIPTION_SEGMENT_SECONDS: float = float(os.getenv("TRANSCRIPTION_SEGMENT_SECONDS", "30"))
+    TRANSCRIPTION_SEGMENT_OVERLAP_SECONDS: float = float(os.getenv("TRANSCRIPTION_SEGMENT_OVERLAP_SECONDS", "1.5"))
+    ASR_MAX_CONCURRENCY: int = int(os.getenv("ASR_MAX_CONCURRENCY", "4"))
+    
+    # Audio normalization before transcription (trim silence, mono, 16 kHz, compact codec)
+    AUDIO_NORMALIZATION: bool = os.getenv("AUDIO_NORMALIZATION", "True").lower() == "true"
+    AUDIO_CODEC: str = os.getenv("AUDIO_CODEC", "opus") # opus | vorbis | flac | wav
+    AUDIO_SILENCE_THRESHOLD_DB: float = float(os.getenv("AUDIO_SILENCE_THRESHOLD_DB", "-40")) # relative to the loudest frame
+    AUDIO_SILENCE_FLOOR_DB: float = float(os.getenv("AUDIO_SILENCE_FLOOR_DB", "-60")) # absolute dBFS
+    # Entries kept in the in-process tier of the transcript cache
+    TRANSCRIPT_CACHE_SIZE: int = int(os.getenv("TRANSCRIPT_CACHE_SIZE", "2048"))
 
 settings = Settings()
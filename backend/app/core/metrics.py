@@ -0,0 +1,60 @@
+import time
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+try:
+    # Optional: spans are only emitted when OpenTelemetry is installed (and
+    # only exported when an SDK/exporter is configured; the API alone is a no-op)
+    from opentelemetry import trace
+    _tracer = trace.get_tracer("voicemail")
+except ImportError:
+    _tracer = None
+
+# Whisper and LLM calls take seconds; storage/DB stages take milliseconds
+_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80, 160)
+
+STAGE_SECONDS = Histogram(
+    "voicemail_stage_duration_seconds",
+    "Wall time per pipeline stage",
+    ["pipeline", "stage", "outcome"],
+    buckets=_BUCKETS,
+)
+VOICEMAILS_INGESTED = Counter("voicemails_ingested_total", "Voicemails accepted for processing", ["source"])
+VOICEMAILS_PROCESSED = Counter("voicemails_processed_total", "Voicemails that finished processing", ["status"])
+LLM_RATE_LIMITED = Counter("llm_rate_limited_total", "Rate-limit responses from the LLM provider")
+LLM_IN_FLIGHT = Gauge("llm_requests_in_flight", "LLM requests currently in flight")
+ASR_IN_FLIGHT = Gauge("asr_requests_in_flight", "Whisper requests currently in flight")
+
+@contextmanager
+def track_stage(stage: str, pipeline: str = "voicemail"):
+    """
+    Times a block into STAGE_SECONDS (labelled ok/error) and wraps it in a span.
+    """
+    span = _tracer.start_as_current_span(f"{pipeline}.{stage}") if _tracer else nullcontext()
+    outcome = "ok"
+    start = time.perf_counter()
+    with span:
+        try:
+            yield
+        except BaseException:
+            outcome = "error"
+            raise
+        finally:
+            STAGE_SECONDS.labels(pipeline, stage, outcome).observe(time.perf_counter() - start)
+
+def timed(stage: str, pipeline: str = "voicemail"):
+    """
+    Decorator form of `track_stage` for coroutine functions.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with track_stage(stage, pipeline):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def render_metrics():
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,104 @@
+import asyncio
+import random
+import re
+import time
+from contextlib import asynccontextmanager
+from typing import Mapping, Optional
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+def parse_reset_duration(value: str) -> Optional[float]:
+    """
+    Parses OpenAI-style reset durations ("20ms", "1.5s", "6m0s") into seconds.
+    """
+    parts = _DURATION_PART.findall(value or "")
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+def retry_after_from_headers(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """
+    Seconds the provider asked us to wait, from Retry-After or x-ratelimit-reset-* headers.
+    """
+    if not headers:
+        return None
+    if headers.get("retry-after-ms"):
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    if headers.get("retry-after"):
+        try:
+            return float(headers["retry-after"])
+        except ValueError:
+            pass
+    resets = [
+        parse_reset_duration(headers.get(name, ""))
+        for name in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+    ]
+    resets = [r for r in resets if r is not None]
+    return max(resets) if resets else None
+
+class TokenBucket:
+    """
+    Paces calls to `rate` per second with bursts of up to `capacity`.
+    """
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: float = 1.0):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+class AdaptiveRateLimiter:
+    """
+    Global backpressure for an upstream API: a concurrency cap, token-bucket
+    pacing, and a shared pause that every caller honors after a 429.
+    """
+    def __init__(self, max_concurrency: int, requests_per_minute: float, base_backoff: float = 1.0, max_backoff: float = 60.0):
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.bucket = TokenBucket(rate=requests_per_minute / 60.0, capacity=max(1.0, max_concurrency))
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.resume_at = 0.0
+        self.in_flight = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        async with self.semaphore:
+            # Re-check after waiting: a 429 elsewhere may have paused everyone meanwhile
+            while (delay := self.resume_at - time.monotonic()) > 0:
+                await asyncio.sleep(delay)
+            await self.bucket.acquire()
+            self.in_flight += 1
+            try:
+                yield
+            finally:
+                self.in_flight -= 1
+
+    def backoff(self, attempt: int, headers: Optional[Mapping[str, str]] = None) -> float:
+        """
+        Records a rate-limit response and pauses all callers; returns the pause in seconds.
+        Uses the provider's hint when present, otherwise exponential backoff with jitter.
+        """
+        delay = retry_after_from_headers(headers)
+        if delay is None:
+            delay = min(self.max_backoff, self.base_backoff * (2 ** attempt))
+            delay *= random.uniform(0.5, 1.0)
+        self.resume_at = max(self.resume_at, time.monotonic() + delay)
+        return delay
+
+    def remaining_pause(self) -> float:
+        return max(0.0, self.resume_at - time.monotonic())
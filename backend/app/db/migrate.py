@@ -0,0 +1,50 @@
+import logging
+import os
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+
+logger = logging.getLogger(__name__)
+
+ALEMBIC_INI = os.path.join(os.path.dirname(__file__), "..", "..", "alembic.ini")
+
+# Revision matching the schema the old startup `create_all` produced. Later
+# migrations only add what is missing, so any pre-Alembic database starts here.
+UNVERSIONED_REVISION = "0001"
+
+def _config() -> Config:
+    config = Config(ALEMBIC_INI)
+    # Keep the app's logging configuration instead of alembic.ini's
+    config.attributes["configure_logger"] = False
+    return config
+
+def stamp_unversioned_database(config: Config) -> bool:
+    """
+    Marks a database created before migrations existed (voicemails table, no
+    alembic_version) as UNVERSIONED_REVISION so `upgrade` doesn't try to
+    recreate its tables. Returns True when it stamped.
+    """
+    from app.db.session import engine
+
+    with engine.connect() as connection:
+        tables = set(inspect(connection).get_table_names())
+    if "alembic_version" in tables or "voicemails" not in tables:
+        return False
+    logger.warning(f"Unversioned database found; stamping revision {UNVERSIONED_REVISION} before upgrading")
+    command.stamp(config, UNVERSIONED_REVISION)
+    return True
+
+def upgrade_database(revision: str = "head"):
+    """
+    Applies pending Alembic migrations to DATABASE_URL, adopting databases
+    created by the old `create_all` first. Blocking; run it from a deploy step
+    (`python -m app.db.migrate`) or off the event loop.
+    """
+    config = _config()
+    stamp_unversioned_database(config)
+    command.upgrade(config, revision)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    upgrade_database()
@@ -1,54 +1,421 @@
-from typing import List, Optional
-from app.models.voicemail import Voicemail
-from app.db.session import SessionLocal
+import base64
+import hashlib
+import json
+from datetime import datetime, timedelta
+from typing import List, Optional, Set, Tuple
+from sqlalchemy import select, insert, update, func, and_, tuple_, literal_column, Float
+from app.models.voicemail import (
+    Voicemail, URGENCY_PRIORITY, UNTRIAGED_PRIORITY, URGENCY_LEVELS, STATUSES, SEARCH_CONFIG, ListSort, SUMMARY_COLUMNS, urgency_priority, analysis_intent, analysis_treatment_mode, utcnow,
+)
+from app.models.transcript_cache import TranscriptCacheEntry
+from app.models.workflow import WorkflowRun, WorkflowStep
+from app.core.config import settings
+from app.db.session import engine, AsyncSessionLocal
 
-class Database:
-    def __init__(self):
-        pass
+# tsvector search on Postgres; elsewhere search_vector is plain text matched with LIKE
+FULL_TEXT_SEARCH = engine.dialect.name == "postgresql"
 
+def _pack(key: list) -> str:
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+def _unpack(cursor: str, size: int) -> list:
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(key, list) or len(key) != size:
+        raise ValueError("Invalid cursor")
+    return key
+
+# Keyset columns per list order, all in one direction: (keys, descending);
+# keys are in LIST_SORT_COLUMNS
+LIST_SORTS = {
+    "priority": (("priority", "created_at", "id"), True),
+    "priority_asc": (("priority", "created_at", "id"), False),
+    "newest": (("created_at", "id"), True),
+    "oldest": (("created_at", "id"), False),
+}
+LIST_SORT_COLUMNS = {"priority": urgency_priority, "created_at": Voicemail.created_at, "id": Voicemail.id}
+
+def encode_cursor(vm, sort: ListSort = "priority") -> str:
+    """
+    Opaque keyset cursor: the sort key of the last row of a page, tagged with
+    the order it belongs to.
+    """
+    return _pack([sort, URGENCY_PRIORITY.get(vm.urgency, UNTRIAGED_PRIORITY), vm.created_at.isoformat(), vm.id])
+
+def _parse_timestamp(value: str) -> datetime:
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+def decode_cursor(cursor: str, sort: ListSort = "priority") -> dict:
+    cursor_sort, priority, created_at, vm_id = _unpack(cursor, 4)
+    if cursor_sort != sort:
+        raise ValueError("Cursor belongs to a different sort order")
+    try:
+        priority = int(priority)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+    return {"priority": priority, "created_at": _parse_timestamp(created_at), "id": vm_id}
+
+def _seek(keys, descending: bool, values: dict):
+    """
+    Keyset seek: rows strictly after `values` in the order of `keys`.
+
+    A row-value comparison rather than an OR of per-key conditions, so it
+    becomes the start of an index range and page N doesn't re-read the rows
+    of the pages before it. The redundant bound on the first key is what
+    SQLite needs to range-scan an expression index (the triage order).
+    """
+    first, value = LIST_SORT_COLUMNS[keys[0]], values[keys[0]]
+    columns = tuple_(*[LIST_SORT_COLUMNS[key] for key in keys])
+    bound = tuple_(*[values[key] for key in keys])
+    if descending:
+        return and_(first <= value, columns < bound)
+    return and_(first >= value, columns > bound)
+
+CHANGE_FEED_OVERLAP = timedelta(seconds=settings.CHANGE_FEED_OVERLAP_SECONDS)
+# Most versions a change-feed cursor remembers; in a burst its window narrows to these
+CHANGE_FEED_MAX_SEEN = 100
+
+def _change_key(updated_at: datetime, vm_id: str) -> str:
+    # One version of one voicemail, short enough to carry a window of them in a cursor
+    return hashlib.blake2b(f"{vm_id}|{updated_at.isoformat()}".encode(), digest_size=6).hexdigest()
+
+def encode_change_cursor(position: datetime, horizon: Tuple[datetime, str], delivered: list) -> str:
+    """
+    Change-feed cursor: the newest updated_at delivered, the (updated_at, id)
+    the next read starts after (`horizon`, at most CHANGE_FEED_OVERLAP behind)
+    and the keys of the `delivered` versions after the horizon. `delivered` is
+    in (updated_at, id) order; in a burst only the newest CHANGE_FEED_MAX_SEEN
+    are kept and the horizon moves up to the last one dropped.
+    """
+    recent = [row for row in delivered if (row.updated_at, row.id) > horizon]
+    if len(recent) > CHANGE_FEED_MAX_SEEN:
+        dropped = recent[-CHANGE_FEED_MAX_SEEN - 1]
+        horizon = (dropped.updated_at, dropped.id)
+        recent = recent[-CHANGE_FEED_MAX_SEEN:]
+    seen = sorted(_change_key(row.updated_at, row.id) for row in recent)
+    return _pack([position.isoformat(), horizon[0].isoformat(), horizon[1], seen])
+
+def decode_change_cursor(cursor: str) -> Tuple[datetime, Tuple[datetime, str], Set[str]]:
+    position, horizon_at, horizon_id, seen = _unpack(cursor, 4)
+    if not isinstance(horizon_id, str) or not isinstance(seen, list):
+        raise ValueError("Invalid cursor")
+    return _parse_timestamp(position), (_parse_timestamp(horizon_at), horizon_id), set(seen)
+
+def _change_horizon(position: datetime) -> Tuple[datetime, str]:
+    # "" sorts before every id: the whole overlap window, ties included
+    return position - CHANGE_FEED_OVERLAP, ""
+
+def _list_query(
+    status: Optional[str] = None,
+    urgency: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+    intent: Optional[str] = None,
+    treatment_mode: Optional[str] = None,
+    sort: ListSort = "priority",
+):
+    if sort not in LIST_SORTS:
+        raise ValueError(f"Unknown sort: {sort}")
+    # Enum columns: an unknown value is a Postgres error, not an empty page
+    if status and status not in STATUSES:
+        raise ValueError(f"Unknown status: {status}")
+    if urgency and urgency not in URGENCY_LEVELS:
+        raise ValueError(f"Unknown urgency: {urgency}")
+    keys, descending = LIST_SORTS[sort]
+    query = select(*SUMMARY_COLUMNS)
+    if status:
+        query = query.where(Voicemail.status == status)
+    if urgency:
+        query = query.where(Voicemail.urgency == urgency)
+    if intent:
+        query = query.where(analysis_intent == intent)
+    if treatment_mode:
+        query = query.where(analysis_treatment_mode == treatment_mode)
+    if created_from:
+        query = query.where(Voicemail.created_at >= created_from)
+    if created_to:
+        query = query.where(Voicemail.created_at < created_to)
+    if cursor:
+        query = query.where(_seek(keys, descending, decode_cursor(cursor, sort)))
+    order = [LIST_SORT_COLUMNS[key].desc() if descending else LIST_SORT_COLUMNS[key] for key in keys]
+    # One extra row tells us whether there is a next page
+    return query.order_by(*order).limit(limit + 1)
+
+def _list_page(rows: list, limit: int, sort: ListSort = "priority") -> Tuple[List[dict], Optional[str]]:
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1], sort)
+    return [row._asdict() for row in rows], next_cursor
+
+def _changes_query(since: Optional[str] = None, limit: int = 100):
+    # Same lean projection as the list: clients fetch full records they care about
+    query = select(*SUMMARY_COLUMNS)
+    if since:
+        # Re-read the overlap window, where writes that committed late can land;
+        # versions already delivered come back too, so read enough to still fill the page
+        _, (horizon_at, horizon_id), seen = decode_change_cursor(since)
+        # Leading bound first, for SQLite (see _seek)
+        query = query.where(
+            Voicemail.updated_at >= horizon_at,
+            tuple_(Voicemail.updated_at, Voicemail.id) > tuple_(horizon_at, horizon_id),
+        )
+        limit += len(seen)
+    return query.order_by(Voicemail.updated_at, Voicemail.id).limit(limit)
+
+def _changes_page(rows: list, since: Optional[str], limit: int) -> Tuple[List[dict], Optional[str]]:
+    """
+    Drops the versions `since` already delivered and returns up to `limit` new
+    ones, with the cursor to resume from (`since` itself when nothing is new).
+    """
+    position, horizon, seen = decode_change_cursor(since) if since else (None, None, set())
+    page, delivered = [], []
+    for row in rows:
+        key = _change_key(row.updated_at, row.id)
+        if key in seen:
+            delivered.append(row)
+        elif len(page) < limit:
+            page.append(row)
+            delivered.append(row)
+    if not page:
+        return [], since
+    position = max(position, page[-1].updated_at) if position else page[-1].updated_at
+    # Never back below a horizon a burst narrowed: those versions are no longer in `seen`
+    horizon = max(horizon, _change_horizon(position)) if horizon else _change_horizon(position)
+    return [row._asdict() for row in page], encode_change_cursor(position, horizon, delivered)
+
+def encode_search_cursor(row) -> str:
+    return _pack([row.rank, row.created_at.isoformat(), row.id])
+
+def decode_search_cursor(cursor: str) -> Tuple[float, datetime, str]:
+    rank, created_at, vm_id = _unpack(cursor, 3)
+    try:
+        rank = float(rank)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+    return rank, _parse_timestamp(created_at), vm_id
+
+def _like_pattern(term: str) -> str:
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+def _search_query(q: str, cursor: Optional[str] = None, limit: int = 20):
+    terms = q.split()
+    if not terms:
+        raise ValueError("Empty search query")
+    if FULL_TEXT_SEARCH:
+        # websearch syntax: quoted phrases, OR, -exclusions; matching uses the GIN index
+        tsquery = func.websearch_to_tsquery(literal_column(f"'{SEARCH_CONFIG}'"), q)
+        rank = func.ts_rank_cd(Voicemail.search_vector, tsquery, type_=Float)
+        query = select(*SUMMARY_COLUMNS, rank.label("rank")).where(Voicemail.search_vector.op("@@")(tsquery))
+    else:
+        # Every term must appear somewhere (case-insensitive for ASCII); no ranking
+        rank = literal_column("0.0", Float)
+        query = select(*SUMMARY_COLUMNS, rank.label("rank")).where(*[
+            Voicemail.search_vector.like(_like_pattern(term), escape="\\") for term in terms
+        ])
+    if cursor:
+        # Keyset seek in (rank DESC, created_at DESC, id DESC), as one row comparison
+        last_rank, created_at, vm_id = decode_search_cursor(cursor)
+        query = query.where(tuple_(rank, Voicemail.created_at, Voicemail.id) < tuple_(last_rank, created_at, vm_id))
+    return query.order_by(rank.desc(), Voicemail.created_at.desc(), Voicemail.id.desc()).limit(limit + 1)
+
+def _search_page(rows: list, limit: int) -> Tuple[List[dict], Optional[str]]:
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_search_cursor(rows[-1])
+    return [row._asdict() for row in rows], next_cursor
+
+_version_query = select(func.max(Voicemail.updated_at))
+
+def _change_window_query(position: datetime):
+    # Newest versions within the overlap window up to `position`: what a cursor there
+    # has delivered (one more than a cursor keeps, so a burst narrows its horizon)
+    return (
+        select(Voicemail.updated_at, Voicemail.id)
+        .where(Voicemail.updated_at >= position - CHANGE_FEED_OVERLAP, Voicemail.updated_at <= position)
+        .order_by(Voicemail.updated_at.desc(), Voicemail.id.desc())
+        .limit(CHANGE_FEED_MAX_SEEN + 1)
+    )
+
+def _update_query(vm_id: str, updates: dict):
+    # updated_at is set explicitly so it's part of the same statement
+    return (
+        update(Voicemail)
+        .where(Voicemail.id == vm_id)
+        .values(**updates, updated_at=utcnow())
+        .returning(Voicemail)
+    )
+
+def _bulk_rows(rows: List[dict]) -> List[dict]:
+    # ORM bulk UPDATE by primary key (executemany); onupdate hooks don't fire
+    # on this path, so updated_at is set explicitly
+    now = utcnow()
+    return [{**row, "updated_at": now} for row in rows]
+
+class AsyncDatabase:
+    """
+    Voicemail, transcript cache and workflow storage for request handlers,
+    Inngest steps and the embedded worker; one short session per call.
+    """
     def get_session(self):
-        return SessionLocal()
-
-    def save_voicemail(self, vm_data: dict):
-        db = self.get_session()
-        try:
-            # Create SQLAlchemy model instance
-            # We assume vm_data keys match Voicemail columns
-            # JSON field 'analysis' needs to be handled if passed as dict
-            db_vm = Voicemail(**vm_data)
-            db.add(db_vm)
-            db.commit()
-            db.refresh(db_vm)
+        return AsyncSessionLocal()
+
+    async def save_voicemail(self, vm_data: dict):
+        async with self.get_session() as session:
+            db_vm = await session.scalar(insert(Voicemail).values(**vm_data).returning(Voicemail))
+            await session.commit()
             return db_vm
-        finally:
-            db.close()
-
-    def get_voicemail(self, vm_id: str) -> Optional[Voicemail]:
-        db = self.get_session()
-        try:
-            return db.query(Voicemail).filter(Voicemail.id == vm_id).first()
-        finally:
-            db.close()
-
-    def update_voicemail(self, vm_id: str, updates: dict):
-        db = self.get_session()
-        try:
-            db_vm = db.query(Voicemail).filter(Voicemail.id == vm_id).first()
-            if db_vm:
-                for key, value in updates.items():
-                    setattr(db_vm, key, value)
-                db.commit()
-                db.refresh(db_vm)
+
+    async def bulk_save_voicemails(self, rows: List[dict]):
+        """
+        Inserts many voicemails in one executemany INSERT and one commit.
+        """
+        if not rows:
+            return
+        async with self.get_session() as session:
+            await session.execute(insert(Voicemail), rows)
+            await session.commit()
+
+    async def get_voicemail(self, vm_id: str) -> Optional[Voicemail]:
+        async with self.get_session() as session:
+            return await session.get(Voicemail, vm_id)
+
+    async def update_voicemail(self, vm_id: str, updates: dict):
+        """
+        Single-statement UPDATE ... RETURNING; None if the voicemail doesn't exist.
+        """
+        async with self.get_session() as session:
+            db_vm = await session.scalar(_update_query(vm_id, updates))
+            await session.commit()
             return db_vm
-        finally:
-            db.close()
-            
-    def list_voicemails(self) -> List[Voicemail]:
-        db = self.get_session()
-        try:
-            return db.query(Voicemail).all()
-        finally:
-            db.close()
+
+    async def bulk_update_voicemails(self, rows: List[dict]):
+        """
+        Applies many updates in one statement batch and one commit.
+        Each row is a dict of column values including the `id` to update.
+        """
+        if not rows:
+            return
+        async with self.get_session() as session:
+            await session.execute(update(Voicemail), _bulk_rows(rows))
+            await session.commit()
+
+    async def list_voicemails(
+        self,
+        status: Optional[str] = None,
+        urgency: Optional[str] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+        intent: Optional[str] = None,
+        treatment_mode: Optional[str] = None,
+        sort: ListSort = "priority",
+    ) -> Tuple[List[dict], Optional[str]]:
+        """
+        One page of voicemail summaries (SUMMARY_COLUMNS, as dicts) in `sort` order;
+        the default is triage order (urgency, then newest first). Returns the page
+        and the cursor for the next one (None on the last page).
+        """
+        query = _list_query(status, urgency, created_from, created_to, cursor, limit, intent, treatment_mode, sort)
+        async with self.get_session() as session:
+            return _list_page(list(await session.execute(query)), limit, sort)
+
+    async def list_changes(self, since: Optional[str] = None, limit: int = 100) -> Tuple[List[dict], Optional[str]]:
+        """
+        Summaries of voicemails created or updated after the `since` cursor, oldest change first.
+        Always returns a cursor to resume from (unchanged when nothing is new).
+        """
+        query = _changes_query(since, limit)
+        async with self.get_session() as session:
+            return _changes_page(list(await session.execute(query)), since, limit)
+
+    async def search_voicemails(self, q: str, cursor: Optional[str] = None, limit: int = 20) -> Tuple[List[dict], Optional[str]]:
+        """
+        Summaries (plus `rank`) of voicemails matching `q` in the transcript, patient
+        name, summary or symptoms, best match first. Returns the page and the cursor
+        for the next one.
+        """
+        query = _search_query(q, cursor, limit)
+        async with self.get_session() as session:
+            return _search_page(list(await session.execute(query)), limit)
+
+    async def get_version(self) -> Optional[datetime]:
+        """
+        Latest write timestamp across all voicemails; an index-only probe used for ETags.
+        """
+        async with self.get_session() as session:
+            return await session.scalar(_version_query)
+
+    async def get_change_head(self) -> Optional[str]:
+        """
+        Change-feed cursor for the latest write, so `since=` returns only what follows it.
+        """
+        async with self.get_session() as session:
+            position = await session.scalar(_version_query)
+            if position is None:
+                return None
+            rows = list(await session.execute(_change_window_query(position)))
+            return encode_change_cursor(position, _change_horizon(position), rows[::-1])
+
+    async def get_cached_transcript(self, audio_sha256: str, model: str) -> Optional[str]:
+        async with self.get_session() as session:
+            entry = await session.get(TranscriptCacheEntry, (audio_sha256, model))
+            return entry.transcript if entry else None
+
+    async def save_cached_transcript(self, audio_sha256: str, model: str, transcript: str):
+        async with self.get_session() as session:
+            await session.merge(TranscriptCacheEntry(
+                audio_sha256=audio_sha256,
+                model=model,
+                transcript=transcript,
+                created_at=utcnow(),
+            ))
+            await session.commit()
+
+    async def bulk_save_workflow_runs(self, rows: List[dict]):
+        if not rows:
+            return
+        async with self.get_session() as session:
+            await session.execute(insert(WorkflowRun), rows)
+            await session.commit()
+
+    async def get_workflow_run(self, run_id: str) -> Optional[WorkflowRun]:
+        async with self.get_session() as session:
+            return await session.get(WorkflowRun, run_id)
+
+    async def update_workflow_run(self, run_id: str, updates: dict):
+        async with self.get_session() as session:
+            await session.execute(
+                update(WorkflowRun)
+                .where(WorkflowRun.id == run_id)
+                .values(**updates, updated_at=utcnow())
+            )
+            await session.commit()
+
+    async def list_unfinished_workflow_runs(self) -> List[WorkflowRun]:
+        async with self.get_session() as session:
+            query = select(WorkflowRun).where(WorkflowRun.status.in_(["PENDING", "RUNNING"])).order_by(WorkflowRun.created_at)
+            return list(await session.scalars(query))
+
+    async def get_workflow_steps(self, run_id: str) -> dict:
+        async with self.get_session() as session:
+            steps = await session.scalars(select(WorkflowStep).where(WorkflowStep.run_id == run_id))
+            return {step.step_id: step.output for step in steps}
+
+    async def save_workflow_step(self, run_id: str, step_id: str, output):
+        async with self.get_session() as session:
+            await session.merge(WorkflowStep(run_id=run_id, step_id=step_id, output=output, created_at=utcnow()))
+            await session.commit()
 
 # Global instance
-db = Database()
+async_db = AsyncDatabase()
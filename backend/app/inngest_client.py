@@ -1,11 +1,26 @@
+import asyncio
+import datetime
+import functools
+import io
+import logging
+from typing import List, Optional
 import inngest
-import os
-import tempfile
-from minio import Minio
 from app.core.config import settings
-from app.services.transcription import transcribe_audio
-from app.services.intelligence import intelligence_service
-from app.db.storage import db
+from app.core.metrics import track_stage, timed, VOICEMAILS_PROCESSED
+from app.services.transcription import transcribe_file, stitch_transcripts, WHISPER_MODEL
+from app.services.transcript_cache import transcript_cache
+from app.services.intelligence import intelligence_service, llm_limiter
+from app.services.calendly import calendly_service
+from app.services.triage import provisional_urgency
+from app.db.storage import async_db
+from app.models.voicemail import URGENCY_LEVELS
+from app.services.events import voicemail_events
+from app.services.object_storage import object_storage
+
+logger = logging.getLogger(__name__)
+
+# Normalized audio shorter than this is treated as silence
+MIN_SPEECH_SECONDS = 0.1
 
 # Define Client
 inngest_client = inngest.Inngest(
@@ -15,13 +30,212 @@ inngest_client = inngest.Inngest(
     # signing_key=settings.INNGEST_SIGNING_KEY,
 )
 
-# MinIO Client (for downloading during processing)
-minio_client = Minio(
-    settings.MINIO_ENDPOINT,
-    access_key=settings.MINIO_ACCESS_KEY,
-    secret_key=settings.MINIO_SECRET_KEY,
-    secure=settings.MINIO_USE_SSL
-)
+@timed("hash_audio")
+async def hash_voicemail_audio(file_id: str, file_path: str) -> str:
+    """
+    Content hash for audio that went straight to storage (presigned upload), so
+    the API never saw the bytes. Computed here, not taken from the client: a
+    forged digest would let one upload read another's cached transcript.
+    """
+    audio_sha256 = await object_storage.sha256(file_path)
+    await async_db.update_voicemail(file_id, {"audio_sha256": audio_sha256})
+    return audio_sha256
+
+@timed("lookup_transcript")
+async def lookup_transcript(audio_sha256: str = None) -> Optional[str]:
+    # Same audio already transcribed (duplicate call or retry): skip download, normalization and Whisper
+    if not audio_sha256:
+        return None
+    return await transcript_cache.get(audio_sha256, WHISPER_MODEL)
+
+@timed("normalize_audio")
+async def normalize_voicemail_audio(file_id: str, file_path: str) -> dict:
+    """
+    Stores a trimmed, mono, 16 kHz, compactly encoded copy of the upload next to
+    the original (which is kept for playback) and records size/duration metrics.
+    Normalizing costs ~2 s of CPU per file, so audio that is already mono at
+    <= 16 kHz is transcribed as is. Returns the object key to transcribe and the metrics.
+    """
+    if not settings.AUDIO_NORMALIZATION:
+        return {"file_path": file_path, "metrics": None}
+    # numpy/soundfile load on first use, not at startup
+    from app.services.audio import normalize_audio, probe_audio, needs_normalization, CODECS
+
+    with await object_storage.download_spooled(file_path) as original:
+        data = original.read()
+
+    probe = probe_audio(data)
+    if probe is not None and not needs_normalization(probe):
+        metrics = {
+            "normalized": False,
+            "original_bytes": len(data),
+            "original_sample_rate": probe["sample_rate"],
+            "original_duration_s": probe["duration_s"],
+        }
+        await async_db.update_voicemail(file_id, {"audio_metrics": metrics})
+        return {"file_path": file_path, "metrics": metrics}
+
+    # CPU-bound (decode, filter, encode): keep it off the event loop
+    result = await asyncio.to_thread(normalize_audio, data) if probe is not None else None
+
+    if result is None:
+        metrics = {"normalized": False, "original_bytes": len(data)}
+        normalized_path = file_path
+    else:
+        encoded, codec, metrics = result
+        if metrics["normalized_duration_s"] < MIN_SPEECH_SECONDS:
+            # Nothing above the silence threshold: let Whisper judge the original
+            metrics = {**metrics, "normalized": False}
+            normalized_path = file_path
+        else:
+            _, _, extension, content_type = CODECS[codec]
+            normalized_path = f"normalized/{file_id}.{extension}"
+            await object_storage.put_object(normalized_path, io.BytesIO(encoded), length=len(encoded), content_type=content_type)
+
+    await async_db.update_voicemail(file_id, {"audio_metrics": metrics})
+    return {"file_path": normalized_path, "metrics": metrics}
+
+async def transcribe_voicemail(file_path: str, audio_sha256: str = None) -> str:
+    # Pipe storage bytes straight into the Whisper request; the buffer
+    # only spills to disk above TRANSCRIPTION_SPOOL_MAX_BYTES
+    with track_stage("download"):
+        audio = await object_storage.download_spooled(file_path)
+    with audio, track_stage("whisper"):
+        transcript = await transcribe_file(file_path, audio)
+
+    if audio_sha256 and transcript:
+        await transcript_cache.set(audio_sha256, WHISPER_MODEL, transcript)
+    return transcript
+
+def needs_segmentation(normalized: dict) -> bool:
+    # Only decodable audio with a known duration is split: the normalized copy,
+    # or an original that was already mono 16 kHz (silent input stays whole)
+    metrics = normalized.get("metrics") or {}
+    duration = metrics.get("normalized_duration_s", metrics.get("original_duration_s", 0))
+    return duration > settings.TRANSCRIPTION_SEGMENT_THRESHOLD_SECONDS
+
+@timed("plan_segments")
+async def plan_transcript_segments(file_id: str, file_path: str) -> List[str]:
+    """
+    Splits long audio on silence into overlapping chunks and uploads each one
+    as segments/{file_id}/{index}. Returns the segment keys in playback order.
+    """
+    from app.services.audio import split_audio, CODECS
+
+    with await object_storage.download_spooled(file_path) as audio:
+        data = audio.read()
+    segments = await asyncio.to_thread(split_audio, data)
+
+    keys, uploads = [], []
+    for index, (encoded, codec) in enumerate(segments):
+        _, _, extension, content_type = CODECS[codec]
+        key = f"segments/{file_id}/{index:03d}.{extension}"
+        keys.append(key)
+        uploads.append(object_storage.put_object(key, io.BytesIO(encoded), length=len(encoded), content_type=content_type))
+    await asyncio.gather(*uploads)
+    return keys
+
+async def finish_segmented_transcript(texts: List[str], audio_sha256: str = None) -> str:
+    transcript = stitch_transcripts(texts)
+    if audio_sha256 and transcript:
+        await transcript_cache.set(audio_sha256, WHISPER_MODEL, transcript)
+    return transcript
+
+async def cleanup_intermediate_audio(file_id: str) -> int:
+    """
+    Deletes the normalized copy and transcription segments once the transcript
+    exists; the original upload is kept for playback. Best effort: a leftover
+    object isn't worth failing the triage over.
+    """
+    removed = 0
+    for prefix in (f"normalized/{file_id}.", f"segments/{file_id}/"):
+        try:
+            removed += await object_storage.remove_prefix(prefix)
+        except Exception as e:
+            logger.warning(f"Could not delete {prefix}*: {str(e)}")
+    return removed
+
+async def prepare_transcript(file_id: str, file_path: str, audio_sha256: str = None) -> str:
+    """
+    Cache lookup, normalization and transcription in one call (one step per item in batch mode).
+    Long voicemails are still transcribed segment by segment, concurrently.
+    """
+    if not audio_sha256:
+        audio_sha256 = await hash_voicemail_audio(file_id, file_path)
+    transcript = await lookup_transcript(audio_sha256)
+    if transcript is None:
+        try:
+            normalized = await normalize_voicemail_audio(file_id, file_path)
+            if needs_segmentation(normalized):
+                keys = await plan_transcript_segments(file_id, normalized["file_path"])
+                texts = await asyncio.gather(*(transcribe_voicemail(key) for key in keys))
+                transcript = await finish_segmented_transcript(list(texts), audio_sha256)
+            else:
+                transcript = await transcribe_voicemail(normalized["file_path"], audio_sha256)
+        finally:
+            # A retry of this step starts over from the original anyway
+            await cleanup_intermediate_audio(file_id)
+    return transcript
+
+async def prepare_batch_transcript(file_id: str, file_path: str, audio_sha256: str = None) -> dict:
+    """
+    prepare_transcript for one voicemail of a batch: {"transcript": ...}, or
+    {"error": ...} when it fails, so only that voicemail is marked FAILED and
+    the rest of the batch is still analyzed. Failed items aren't retried;
+    re-triage them.
+    """
+    try:
+        return {"transcript": await prepare_transcript(file_id, file_path, audio_sha256)}
+    except Exception as e:
+        logger.warning(f"Transcription failed for {file_id}: {str(e)}")
+        return {"error": str(e)}
+
+def resolve_outcome(transcript: str, analysis: dict, red_flags: list = None) -> dict:
+    """
+    Maps a transcript + LLM analysis onto the final voicemail columns.
+    The LLM urgency confirms or overrides any provisional fast-path urgency;
+    the red flags that triggered it are kept on the analysis for audit.
+    """
+    # Determine Status and Urgency
+    final_status = "COMPLETED"
+    final_urgency = str(analysis.get("urgency") or "GREEN").upper()
+    if final_urgency not in URGENCY_LEVELS:
+        # Urgency is an enum column: anything the LLM invents goes to a human
+        final_urgency = "NEED_VALIDATION"
+    missing_info = analysis.get("missing_info", [])
+    
+    # 1. Check Transcript
+    if not transcript:
+        final_status = "FAILED"
+        final_urgency = "RED" # Failed transcription is critical
+    
+    # 2. Check Required Fields / Validation
+    elif final_urgency == "NEED_VALIDATION" or len(missing_info) > 0:
+        final_status = "NEED_VALIDATION"
+        final_urgency = "NEED_VALIDATION" # Ensure frontend badge matches
+
+    # Context-aware booking URL
+    treatment_mode = analysis.get("treatment_mode", "Telehealth")
+    booking_url = calendly_service.get_base_url(treatment_mode)
+    
+    # Flatten analysis for simpler DB structure or keep nested
+    return {
+        "transcript": transcript,
+        "status": final_status,
+        "urgency": final_urgency,
+        "category": analysis.get("intent", "Unknown"),
+        "analysis": {
+            **analysis,
+            **({"red_flags": red_flags} if red_flags else {}),
+            "booking_url": booking_url
+        }
+    }
+
+def _retry_later(e: Exception) -> inngest.RetryAfterError:
+    # Still throttled after local backoff: have Inngest retry this step later
+    # instead of hammering the API or marking the voicemail failed
+    retry_after = max(llm_limiter.remaining_pause(), 30.0)
+    return inngest.RetryAfterError(str(e), int(retry_after * 1000))
 
 @inngest_client.create_function(
     fn_id="process_voicemail",
@@ -32,85 +246,202 @@ async def process_voicemail(ctx, step=None):
         step = ctx.step
     """
     Durable workflow:
-    1. Download audio from MinIO
-    2. Transcribe (Whisper)
+    1. Download audio from MinIO (unless the transcript is cached) and normalize it
+    2. Transcribe (Whisper; long audio as parallel segments), delete the intermediate
+       audio, then provisional RED via keyword fast-path
     3. Analyze (LangGraph + LLM)
     4. Update DB
     """
     file_id = ctx.event.data["file_id"]
     file_path = ctx.event.data["file_path"] # e.g. "uuid.wav"
+    audio_sha256 = ctx.event.data.get("audio_sha256")
+    # Re-triage requests bypass the analysis cache
+    use_cache = not ctx.event.data.get("retriage", False)
     
     try:
-        # --- Step 1: Download & Transcribe ---
-        # We wrap this in step.run to memoize the transcript
-        async def run_transcription():
-            # Create a temp file
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp:
-                try:
-                    minio_client.fget_object(
-                        settings.MINIO_BUCKET,
-                        file_path,
-                        tmp.name
-                    )
-                    # Call Whisper Service
-                    return await transcribe_audio(file_path, tmp.name)
-                finally:
-                    # Cleanup
-                    if os.path.exists(tmp.name):
-                        os.unlink(tmp.name)
-
-        transcript = await step.run("transcribe_audio", run_transcription)
-        print(transcript)
-        analysis = await step.run("analyze_intent_urgency", lambda: intelligence_service.analyze_transcript(transcript))
-        print(analysis)
-        # --- Step 3: Determine Booking URL ---
-        from app.services.calendly import calendly_service
-        
-        treatment_mode = analysis.get("treatment_mode", "Telehealth")
-        booking_url = calendly_service.get_base_url(treatment_mode)
+        # --- Step 1: Normalize & Transcribe ---
+        # We wrap each stage in step.run to memoize the transcript
+        if not audio_sha256:
+            # Direct uploads arrive unhashed
+            audio_sha256 = await step.run("hash_audio", hash_voicemail_audio, file_id, file_path)
+        transcript = await step.run("lookup_transcript", lookup_transcript, audio_sha256)
+        if transcript is None:
+            normalized = await step.run("normalize_audio", normalize_voicemail_audio, file_id, file_path)
+            if needs_segmentation(normalized):
+                # One memoized step per segment: a retry only redoes the segments that failed
+                keys = await step.run("plan_segments", plan_transcript_segments, file_id, normalized["file_path"])
+                texts = await ctx.group.parallel(tuple(
+                    functools.partial(step.run, f"transcribe_segment_{index}", transcribe_voicemail, key)
+                    for index, key in enumerate(keys)
+                ))
+                transcript = await step.run("stitch_transcript", finish_segmented_transcript, list(texts), audio_sha256)
+            else:
+                transcript = await step.run("transcribe_audio", transcribe_voicemail, normalized["file_path"], audio_sha256)
+            # Nothing reads the intermediates once the transcript is memoized. Not done
+            # on failure: retried segment steps still need their objects
+            await step.run("cleanup_audio", cleanup_intermediate_audio, file_id)
+
+        # --- Step 1b: Fast-path triage ---
+        # Keyword match runs in microseconds; a provisional RED is written right
+        # away so emergencies sort to the top while the LLM is still working
+        async def run_fast_triage():
+            with track_stage("fast_triage"):
+                triage = provisional_urgency(transcript)
+            if triage["urgency"]:
+                vm = await async_db.update_voicemail(file_id, {
+                    "transcript": transcript,
+                    "urgency": triage["urgency"],
+                    "analysis": {"provisional": True, "red_flags": triage["red_flags"]}
+                })
+                if vm:
+                    voicemail_events.publish_voicemail(vm)
+            return triage["red_flags"]
+
+        red_flags = await step.run("fast_triage", run_fast_triage)
+
+        # --- Step 2: Analyze (non-blocking, concurrency-limited LLM call) ---
+        async def run_analysis():
+            from openai import RateLimitError
+
+            try:
+                with track_stage("llm_analysis"):
+                    return await intelligence_service.aanalyze_transcript(transcript, use_cache=use_cache)
+            except RateLimitError as e:
+                raise _retry_later(e)
+
+        analysis = await step.run("analyze_intent_urgency", run_analysis)
         
-        # --- Step 4: Update Database ---
+        # --- Step 3: Update Database ---
         async def update_state():
-            # Determine Status and Urgency
-            final_status = "COMPLETED"
-            final_urgency = analysis.get("urgency", "GREEN")
-            missing_info = analysis.get("missing_info", [])
-            
-            # 1. Check Transcript
-            if not transcript:
-                final_status = "FAILED"
-                final_urgency = "RED" # Failed transcription is critical
-            
-            # 2. Check Required Fields / Validation
-            elif final_urgency == "NEED_VALIDATION" or len(missing_info) > 0:
-                final_status = "NEED_VALIDATION"
-                final_urgency = "NEED_VALIDATION" # Ensure frontend badge matches
-            
-            # Flatten analysis for simpler DB structure or keep nested
-            db.update_voicemail(file_id, {
-                "transcript": transcript,
-                "status": final_status,
-                "urgency": final_urgency,
-                "category": analysis.get("intent", "Unknown"),
-                "analysis": {
-                    **analysis,
-                    "booking_url": booking_url # Context-aware URL
-                }
-            })
-            return f"Updated status to {final_status}"
+            updates = resolve_outcome(transcript, analysis, red_flags)
+            with track_stage("update_db"):
+                vm = await async_db.update_voicemail(file_id, updates)
+            VOICEMAILS_PROCESSED.labels(updates["status"]).inc()
+            if vm:
+                voicemail_events.publish_voicemail(vm)
+            return f"Updated status to {updates['status']}"
 
         await step.run("update_db", update_state)
 
         return {"status": "success", "transcript_snippet": transcript[:50], "analysis": analysis}
 
+    except inngest.RetryAfterError:
+        # Transient (rate limited): the run is rescheduled, the voicemail stays PROCESSING
+        raise
     except Exception as e:
         # Capture error and set status to FAILED
         async def mark_failed():
-            db.update_voicemail(file_id, {
+            vm = await async_db.update_voicemail(file_id, {
                 "status": "FAILED",
                 "analysis": {"error": str(e)}
             })
+            VOICEMAILS_PROCESSED.labels("FAILED").inc()
+            if vm:
+                voicemail_events.publish_voicemail(vm)
             return "Failed"
         
         await step.run("mark_failed", mark_failed)
         raise e # Re-raise to let Inngest know it failed (triggering retries if valid)
+
+@inngest_client.create_function(
+    fn_id="process_voicemail_batch",
+    trigger=inngest.TriggerEvent(event="voicemail/received"),
+    batch_events=inngest.Batch(
+        max_size=settings.TRIAGE_BATCH_MAX_SIZE,
+        timeout=datetime.timedelta(seconds=settings.TRIAGE_BATCH_TIMEOUT_SECONDS),
+    ),
+)
+async def process_voicemail_batch(ctx):
+    """
+    Burst-friendly variant of process_voicemail (TRIAGE_MODE=batch):
+    1. Transcribe every voicemail in the batch in parallel (one memoized step each),
+       then flag red-flag voicemails RED provisionally. A voicemail that can't be
+       transcribed is marked FAILED on its own; the rest carry on
+    2. Analyze all transcripts in one multi-item LLM request
+    3. Write every result with one bulk DB update
+    """
+    step = ctx.step
+    # Inngest may deliver the same event twice within a batch; key by voicemail id
+    events = {event.data["file_id"]: event.data for event in ctx.events}
+    skip_cache_ids = {file_id for file_id, data in events.items() if data.get("retriage", False)}
+
+    try:
+        # --- Step 1: Transcribe (parallel, memoized per voicemail) ---
+        prepared = await ctx.group.parallel(tuple(
+            functools.partial(step.run, f"prepare_transcript_{file_id}", prepare_batch_transcript, file_id, data["file_path"], data.get("audio_sha256"))
+            for file_id, data in events.items()
+        ))
+        prepared = dict(zip(events.keys(), prepared))
+        failures = {file_id: item["error"] for file_id, item in prepared.items() if "error" in item}
+        transcripts = {file_id: item["transcript"] for file_id, item in prepared.items() if "error" not in item}
+
+        # --- Step 1b: Fast-path triage for the whole batch ---
+        async def run_batch_fast_triage():
+            flagged = {}
+            for file_id, transcript in transcripts.items():
+                triage = provisional_urgency(transcript)
+                if triage["urgency"]:
+                    flagged[file_id] = triage
+            await async_db.bulk_update_voicemails([
+                {"id": file_id, "transcript": transcripts[file_id], "urgency": triage["urgency"],
+                 "analysis": {"provisional": True, "red_flags": triage["red_flags"]}}
+                for file_id, triage in flagged.items()
+            ])
+            for file_id, triage in flagged.items():
+                voicemail_events.publish({"id": file_id, "status": "PROCESSING", "urgency": triage["urgency"]})
+            return {file_id: triage["red_flags"] for file_id, triage in flagged.items()}
+
+        red_flags = await step.run("fast_triage_batch", run_batch_fast_triage)
+
+        # --- Step 2: Analyze the whole batch in one request ---
+        async def run_batch_analysis():
+            from openai import RateLimitError
+
+            # Empty transcripts are failed outright; no point paying for them
+            to_analyze = {file_id: transcript for file_id, transcript in transcripts.items() if transcript}
+            try:
+                with track_stage("llm_analysis", pipeline="batch"):
+                    return await intelligence_service.aanalyze_batch(to_analyze, skip_cache_ids=skip_cache_ids)
+            except RateLimitError as e:
+                raise _retry_later(e)
+
+        analyses = await step.run("analyze_batch", run_batch_analysis)
+
+        # --- Step 3: One bulk update for every voicemail in the batch ---
+        async def update_batch_state():
+            rows = [
+                {"id": file_id, **resolve_outcome(transcript, analyses.get(file_id, {}), red_flags.get(file_id))}
+                for file_id, transcript in transcripts.items()
+            ] + [
+                {"id": file_id, "status": "FAILED", "analysis": {"error": error}}
+                for file_id, error in failures.items()
+            ]
+            with track_stage("update_db", pipeline="batch"):
+                await async_db.bulk_update_voicemails(rows)
+            for row in rows:
+                VOICEMAILS_PROCESSED.labels(row["status"]).inc()
+                voicemail_events.publish({"id": row["id"], "status": row["status"], "urgency": row.get("urgency")})
+            return f"Updated {len(rows)} voicemails"
+
+        await step.run("update_db_batch", update_batch_state)
+
+        return {"status": "success", "count": len(events), "failed": len(failures)}
+
+    except inngest.RetryAfterError:
+        raise
+    except Exception as e:
+        async def mark_batch_failed():
+            await async_db.bulk_update_voicemails([
+                {"id": file_id, "status": "FAILED", "analysis": {"error": str(e)}}
+                for file_id in events
+            ])
+            VOICEMAILS_PROCESSED.labels("FAILED").inc(len(events))
+            for file_id in events:
+                voicemail_events.publish({"id": file_id, "status": "FAILED", "urgency": None})
+            return "Failed"
+
+        await step.run("mark_batch_failed", mark_batch_failed)
+        raise e
+
+# Only one triage mode is served at a time; both listen to voicemail/received
+inngest_functions = [process_voicemail_batch] if settings.TRIAGE_MODE == "batch" else [process_voicemail]
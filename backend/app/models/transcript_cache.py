@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String
+from app.db.session import Base
+from app.models.voicemail import UTCDateTime, utcnow
+
+# SQLAlchemy Model
+class TranscriptCacheEntry(Base):
+    """
+    Persistent tier of the transcript cache, keyed by audio content and ASR model.
+    """
+    __tablename__ = "transcript_cache"
+
+    audio_sha256 = Column(String, primary_key=True)
+    model = Column(String, primary_key=True)
+    transcript = Column(String)
+    created_at = Column(UTCDateTime, default=utcnow)
@@ -0,0 +1,22 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List
+
+class UploadPart(BaseModel):
+    part_number: int = Field(..., ge=1, le=10000)
+    etag: str
+
+class DirectUploadRequest(BaseModel):
+    filename: str = "voicemail.wav"
+    size: int = Field(..., gt=0, description="Total size in bytes; decides single PUT vs multipart")
+    content_type: Optional[str] = None
+
+class UploadPartsRequest(BaseModel):
+    key: str
+    upload_id: str
+    part_numbers: Optional[List[int]] = Field(None, description="Parts to presign again; default: every part not yet uploaded")
+    size: Optional[int] = Field(None, gt=0, description="Total size, used to work out the remaining parts")
+
+class CompleteUploadRequest(BaseModel):
+    key: str
+    upload_id: Optional[str] = None
+    parts: Optional[List[UploadPart]] = Field(None, description="ETags returned by each part PUT; listed from storage when omitted")
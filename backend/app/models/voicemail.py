@@ -1,32 +1,173 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
-from datetime import datetime
-from sqlalchemy import Column, String, JSON, DateTime
+from typing import Optional, List, Literal, get_args
+from datetime import datetime, timezone
+from sqlalchemy import Column, Computed, String, Text, JSON, DateTime, Enum, Index, case, func, literal_column
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import deferred
+from sqlalchemy.sql.expression import ColumnElement
+from sqlalchemy.types import TypeDecorator
 from app.db.session import Base
 
+# Values of the voicemail_urgency / voicemail_status enum columns. The Literal
+# types validate query parameters, so unknown values are a 422, not a DB error.
+Urgency = Literal["RED", "YELLOW", "GREEN", "NEED_VALIDATION"]
+Status = Literal["PROCESSING", "COMPLETED", "FAILED", "NEED_VALIDATION"]
+URGENCY_LEVELS = get_args(Urgency)
+STATUSES = get_args(Status)
+
+# Triage order used by the list endpoint (higher priority = shown first):
+# voicemails awaiting a clinician's validation come right after RED, ahead of
+# YELLOW; untriaged ones (no urgency yet) come last. Higher-first, so the
+# priority order is descending in every key and one row comparison seeks it.
+URGENCY_PRIORITY = {"RED": 4, "NEED_VALIDATION": 3, "YELLOW": 2, "GREEN": 1}
+UNTRIAGED_PRIORITY = 0
+
+# List orders: triage (critical first, newest first) and its exact reverse,
+# newest and oldest. Each one is served by an index scanned in one direction.
+ListSort = Literal["priority", "priority_asc", "newest", "oldest"]
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+class UTCDateTime(TypeDecorator):
+    """
+    Timezone-aware UTC timestamps on every backend: timestamptz on Postgres;
+    SQLite stores them naive, so the offset is re-attached on load.
+    """
+    impl = DateTime(timezone=True)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        return value
+
+    def process_result_value(self, value, dialect):
+        if value is not None and value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value
+
+# JSONB on Postgres (indexable, binary), plain JSON elsewhere
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
+# Text search configuration and the analysis keys that are searchable, with
+# their tsvector weight (A ranks highest); the transcript itself is weighted C
+SEARCH_CONFIG = "english"
+SEARCH_ANALYSIS_FIELDS = (("patient_name", "A"), ("summary", "B"), ("symptoms", "B"))
+SEARCH_TRANSCRIPT_WEIGHT = "C"
+
+class SearchDocument(ColumnElement):
+    """
+    Generation expression of `voicemails.search_vector`: a weighted tsvector on
+    Postgres, and on other backends the concatenated text (for LIKE matching).
+    """
+    inherit_cache = True
+
 # SQLAlchemy Model
 class Voicemail(Base):
     __tablename__ = "voicemails"
 
     id = Column(String, primary_key=True, index=True)
-    status = Column(String, default="PROCESSING")
+    status = Column(Enum(*STATUSES, name="voicemail_status"), default="PROCESSING")
     file_path = Column(String)
-    created_at = Column(String) # Storing as string for simplicity in this migration, or DateTime
+    created_at = Column(UTCDateTime, default=utcnow)
     transcript = Column(String, nullable=True)
-    urgency = Column(String, nullable=True)
+    urgency = Column(Enum(*URGENCY_LEVELS, name="voicemail_urgency"), nullable=True)
     category = Column(String, nullable=True)
-    analysis = Column(JSON, nullable=True)
+    analysis = Column(JSONType, nullable=True)
+    # SHA-256 of the uploaded audio; keys the transcript cache
+    audio_sha256 = Column(String, nullable=True, index=True)
+    # Size/duration before and after audio normalization
+    audio_metrics = Column(JSONType, nullable=True)
+    # Bumped on every write; drives the change feed and list ETags
+    updated_at = Column(UTCDateTime, default=utcnow, onupdate=utcnow)
+    # Generated by the database from the transcript and analysis, so every write
+    # path (single, bulk, retriage) keeps it current. Never loaded with the row.
+    search_vector = deferred(Column(Text().with_variant(TSVECTOR(), "postgresql"), Computed(SearchDocument(), persisted=True)))
+
+# Same expression is used by the ORDER BY of the list queries, so the
+# planner can walk the expression indexes below instead of sorting the table.
+# Literals are inlined (not bound) so the query text matches the index expression.
+urgency_priority = case(
+    *[(Voicemail.urgency == literal_column(f"'{level}'"), literal_column(str(priority))) for level, priority in URGENCY_PRIORITY.items()],
+    else_=literal_column(str(UNTRIAGED_PRIORITY)),
+)
+
+# Composite indexes backing keyset pagination: one for the unfiltered
+# triage order and one per supported equality filter. Postgres reflects the
+# CASE back in its own normalized form (enum casts, line breaks), so the Alembic
+# env doesn't diff these expressions; the migrations own them.
+Index("ix_voicemails_triage_order", urgency_priority.desc(), Voicemail.created_at.desc(), Voicemail.id.desc(), info={"compare_expressions": False})
+Index("ix_voicemails_status_triage_order", Voicemail.status, urgency_priority.desc(), Voicemail.created_at.desc(), Voicemail.id.desc(), info={"compare_expressions": False})
+Index("ix_voicemails_urgency_created_at", Voicemail.urgency, Voicemail.created_at.desc(), Voicemail.id.desc())
+# Chronological sorts (newest / oldest first)
+Index("ix_voicemails_created_at_id", Voicemail.created_at.desc(), Voicemail.id.desc())
+# Change feed seek (updated_at, id) and the max(updated_at) version probe
+Index("ix_voicemails_updated_at_id", Voicemail.updated_at, Voicemail.id)
+
+def analysis_field(name: str):
+    """
+    `analysis ->> 'name'` as text. The key is inlined so filters match the
+    expression indexes below; both Postgres (JSONB) and SQLite support `->>`.
+    """
+    return Voicemail.analysis.op("->>", return_type=String)(literal_column(f"'{name}'"))
+
+analysis_intent = analysis_field("intent")
+analysis_treatment_mode = analysis_field("treatment_mode")
+
+# Lean projection for list views: no transcript, no analysis/metrics JSON.
+# Full rows are fetched per item from GET /api/voicemails/{id}.
+SUMMARY_COLUMNS = (
+    Voicemail.id,
+    Voicemail.status,
+    Voicemail.urgency,
+    Voicemail.category,
+    Voicemail.file_path,
+    Voicemail.created_at,
+    Voicemail.updated_at,
+    analysis_intent.label("intent"),
+    analysis_field("summary").label("summary"),
+    Voicemail.transcript.is_not(None).label("has_transcript"),
+)
+Index("ix_voicemails_analysis_intent", analysis_intent)
+Index("ix_voicemails_analysis_treatment_mode", analysis_treatment_mode)
+# Full-text search; other backends scan search_vector with LIKE instead.
+# `dialects` is honoured by the Alembic env when comparing schemas.
+Index("ix_voicemails_search_vector", Voicemail.search_vector, postgresql_using="gin", info={"dialects": ("postgresql",)})
+
+def _search_sources():
+    yield Voicemail.transcript, SEARCH_TRANSCRIPT_WEIGHT
+    for name, weight in SEARCH_ANALYSIS_FIELDS:
+        yield analysis_field(name), weight
+
+@compiles(SearchDocument, "postgresql")
+def _compile_search_document_pg(element, compiler, **kw):
+    config = literal_column(f"'{SEARCH_CONFIG}'")
+    vectors = [
+        func.setweight(func.to_tsvector(config, func.coalesce(source, literal_column("''"))), literal_column(f"'{weight}'"))
+        for source, weight in _search_sources()
+    ]
+    return " || ".join(compiler.process(vector, **kw) for vector in vectors)
+
+@compiles(SearchDocument)
+def _compile_search_document(element, compiler, **kw):
+    parts = [compiler.process(func.coalesce(source, literal_column("''")), **kw) for source, _ in _search_sources()]
+    return " || ' ' || ".join(parts)
 
 # Pydantic Models (Schemas)
 class VoicemailMetadata(BaseModel):
     id: str
     status: str
     file_path: str
-    created_at: str
+    created_at: datetime
     transcript: Optional[str] = None
     urgency: Optional[str] = None
     category: Optional[str] = None
     analysis: Optional[dict] = None
+    updated_at: Optional[datetime] = None
+    audio_sha256: Optional[str] = None
+    audio_metrics: Optional[dict] = None
 
     class Config:
         from_attributes = True
@@ -46,3 +187,15 @@ class AnalysisExtraction(BaseModel):
     referral_plan: Optional[bool] = Field(None, description="True if the patient mentions having a referral or care plan.")
     summary: str = Field(..., description="Brief summary of the voicemail.")
     missing_info: List[str] = Field(default_factory=list, description="List of missing critical information (e.g., 'Patient Name', 'Symptoms', 'Appointment Time') if the intent requires them.")
+
+class BatchAnalysisItem(AnalysisExtraction):
+    """
+    One voicemail's extraction inside a batched LLM request.
+    """
+    voicemail_id: str = Field(..., description="The id of the transcript this analysis belongs to, copied exactly from the input.")
+
+class BatchAnalysisExtraction(BaseModel):
+    """
+    Schema for multi-item LLM extraction (one item per input transcript).
+    """
+    items: List[BatchAnalysisItem] = Field(..., description="One analysis per input transcript, in any order.")
@@ -0,0 +1,35 @@
+from sqlalchemy import Column, String, Integer, JSON, Index
+from app.db.session import Base
+from app.models.voicemail import UTCDateTime, utcnow
+
+# SQLAlchemy Models
+class WorkflowRun(Base):
+    """
+    A function run on the embedded execution backend (EXECUTION_BACKEND=embedded).
+    Unfinished runs are picked up again when the worker restarts.
+    """
+    __tablename__ = "workflow_runs"
+
+    id = Column(String, primary_key=True, index=True)
+    function = Column(String)
+    event = Column(JSON) # {"name": ..., "data": ...}
+    status = Column(String) # PENDING, RUNNING, COMPLETED, FAILED
+    attempts = Column(Integer, default=0)
+    error = Column(String, nullable=True)
+    created_at = Column(UTCDateTime, default=utcnow)
+    updated_at = Column(UTCDateTime, default=utcnow, onupdate=utcnow)
+
+    __table_args__ = (
+        Index("ix_workflow_runs_status", "status"),
+    )
+
+class WorkflowStep(Base):
+    """
+    Memoized output of one completed step.run, so a retried or recovered run skips it.
+    """
+    __tablename__ = "workflow_steps"
+
+    run_id = Column(String, primary_key=True)
+    step_id = Column(String, primary_key=True)
+    output = Column(JSON)
+    created_at = Column(UTCDateTime, default=utcnow)
@@ -0,0 +1,182 @@
+import io
+import logging
+from typing import List, Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+TARGET_SAMPLE_RATE = 16000
+FRAME_SECONDS = 0.02
+
+# codec name -> (soundfile format, subtype, file extension, content type)
+CODECS = {
+    "opus": ("OGG", "OPUS", "ogg", "audio/ogg"),
+    "vorbis": ("OGG", "VORBIS", "ogg", "audio/ogg"),
+    "flac": ("FLAC", "PCM_16", "flac", "audio/flac"),
+    "wav": ("WAV", "PCM_16", "wav", "audio/wav"),
+}
+
+def decode_audio(data: bytes) -> Tuple[np.ndarray, int]:
+    """
+    Decodes any libsndfile-readable container (WAV int/float, FLAC, OGG) into
+    mono float32 samples in [-1, 1]. Raises on formats it can't read.
+    """
+    samples, sample_rate = sf.read(io.BytesIO(data), dtype="float32", always_2d=True)
+    # Downmix: average the channels
+    return samples.mean(axis=1), sample_rate
+
+def frame_rms_db(samples: np.ndarray, sample_rate: int, frame_seconds: float = FRAME_SECONDS) -> np.ndarray:
+    """
+    Per-frame RMS level in dBFS, computed over non-overlapping frames.
+    """
+    frame = max(1, int(sample_rate * frame_seconds))
+    padded = np.pad(samples, (0, (-len(samples)) % frame))
+    rms = np.sqrt(np.mean(padded.reshape(-1, frame) ** 2, axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-10))
+
+def voiced_frames(levels_db: np.ndarray, threshold_db: float) -> np.ndarray:
+    """
+    Boolean mask of frames above the silence threshold, relative to the loudest frame.
+    """
+    if not len(levels_db):
+        return np.zeros(0, dtype=bool)
+    return levels_db > max(levels_db.max() + threshold_db, settings.AUDIO_SILENCE_FLOOR_DB)
+
+def trim_silence(samples: np.ndarray, sample_rate: int, threshold_db: float = None, padding_seconds: float = 0.25) -> np.ndarray:
+    """
+    Drops leading and trailing silence, keeping a little padding around speech.
+    """
+    threshold_db = settings.AUDIO_SILENCE_THRESHOLD_DB if threshold_db is None else threshold_db
+    voiced = np.flatnonzero(voiced_frames(frame_rms_db(samples, sample_rate), threshold_db))
+    if not len(voiced):
+        return samples[:0]
+    frame = max(1, int(sample_rate * FRAME_SECONDS))
+    pad = int(sample_rate * padding_seconds)
+    start = max(0, voiced[0] * frame - pad)
+    end = min(len(samples), (voiced[-1] + 1) * frame + pad)
+    return samples[start:end]
+
+def _lowpass_kernel(cutoff: float, taps: int = 63) -> np.ndarray:
+    # Windowed-sinc FIR; cutoff is a fraction of the input sample rate
+    n = np.arange(taps) - (taps - 1) / 2
+    kernel = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(taps)
+    return kernel / kernel.sum()
+
+def resample(samples: np.ndarray, sample_rate: int, target_rate: int = TARGET_SAMPLE_RATE) -> np.ndarray:
+    if sample_rate == target_rate or not len(samples):
+        return samples
+    if target_rate < sample_rate:
+        # Anti-alias before decimating: keep content below ~0.9 x the new Nyquist
+        samples = np.convolve(samples, _lowpass_kernel(0.45 * target_rate / sample_rate), mode="same")
+    duration = len(samples) / sample_rate
+    target_times = np.arange(int(duration * target_rate)) / target_rate
+    source_times = np.arange(len(samples)) / sample_rate
+    return np.interp(target_times, source_times, samples).astype(np.float32)
+
+def encode_audio(samples: np.ndarray, sample_rate: int, codec: str = None) -> Tuple[bytes, str]:
+    """
+    Encodes mono samples; returns (bytes, codec actually used). Falls back to
+    FLAC when the local libsndfile lacks the requested codec.
+    """
+    codec = codec or settings.AUDIO_CODEC
+    for name in (codec, "flac"):
+        fmt, subtype, _, _ = CODECS[name]
+        buffer = io.BytesIO()
+        try:
+            sf.write(buffer, samples, sample_rate, format=fmt, subtype=subtype)
+        except Exception as e:
+            logger.warning(f"Encoding as {name} failed ({str(e)}), falling back")
+            continue
+        return buffer.getvalue(), name
+    raise RuntimeError("No usable audio codec")
+
+def probe_audio(data: bytes) -> Optional[dict]:
+    """
+    Channel count, sample rate and duration from the container header, without
+    decoding the samples. None if libsndfile can't read the container.
+    """
+    try:
+        info = sf.info(io.BytesIO(data))
+    except Exception as e:
+        logger.warning(f"Audio probe failed: {str(e)}")
+        return None
+    return {"channels": info.channels, "sample_rate": info.samplerate, "duration_s": round(info.duration, 3)}
+
+def needs_normalization(probe: dict) -> bool:
+    # Mono audio at or below 16 kHz (e.g. 8 kHz telephony) is already what
+    # Whisper works on; decoding, trimming and re-encoding it isn't worth the CPU
+    return probe["channels"] > 1 or probe["sample_rate"] > TARGET_SAMPLE_RATE
+
+def normalize_audio(data: bytes) -> Optional[Tuple[bytes, str, dict]]:
+    """
+    Trim silence, downmix to mono, resample to 16 kHz and encode compactly.
+    Returns (encoded bytes, codec, metrics), or None if the input can't be decoded
+    (e.g. a container libsndfile doesn't read), in which case callers keep the original.
+    CPU-bound: run it off the event loop.
+    """
+    try:
+        samples, sample_rate = decode_audio(data)
+    except Exception as e:
+        logger.warning(f"Audio normalization skipped: {str(e)}")
+        return None
+
+    original_duration = len(samples) / sample_rate
+    trimmed = trim_silence(samples, sample_rate)
+    resampled = resample(trimmed, sample_rate)
+    encoded, codec = encode_audio(resampled, TARGET_SAMPLE_RATE)
+
+    metrics = {
+        "normalized": True,
+        "codec": codec,
+        "original_bytes": len(data),
+        "normalized_bytes": len(encoded),
+        "original_sample_rate": sample_rate,
+        "original_duration_s": round(original_duration, 3),
+        "normalized_duration_s": round(len(resampled) / TARGET_SAMPLE_RATE, 3),
+        "trimmed_s": round(original_duration - len(trimmed) / sample_rate, 3),
+        "compression_ratio": round(len(data) / len(encoded), 2) if encoded else None,
+    }
+    return encoded, codec, metrics
+
+def plan_segments(samples: np.ndarray, sample_rate: int, segment_seconds: float, overlap_seconds: float, search_seconds: float = None) -> List[Tuple[int, int]]:
+    """
+    Splits audio into chunks of at most `segment_seconds`, cutting at the quietest
+    frame within `search_seconds` before each nominal boundary so words aren't
+    split, and extends every chunk after the first back by `overlap_seconds`.
+    Returns (start, end) sample offsets.
+    """
+    total = len(samples)
+    segment = int(segment_seconds * sample_rate)
+    if total <= segment:
+        return [(0, total)]
+
+    frame = max(1, int(sample_rate * FRAME_SECONDS))
+    levels = frame_rms_db(samples, sample_rate)
+    search = max(1, int((search_seconds or segment_seconds * 0.25) / FRAME_SECONDS))
+
+    cuts = [0]
+    while total - cuts[-1] > segment:
+        nominal = (cuts[-1] + segment) // frame
+        low = max(cuts[-1] // frame + 1, nominal - search)
+        cuts.append((low + int(np.argmin(levels[low:nominal + 1]))) * frame)
+    cuts.append(total)
+
+    overlap = int(overlap_seconds * sample_rate)
+    return [(max(0, start - overlap) if i else start, end) for i, (start, end) in enumerate(zip(cuts, cuts[1:]))]
+
+def split_audio(data: bytes, segment_seconds: float = None, overlap_seconds: float = None, codec: str = None) -> List[Tuple[bytes, str]]:
+    """
+    Decodes audio and re-encodes it as overlapping, silence-aligned chunks.
+    Returns [(encoded bytes, codec)] in playback order. CPU-bound.
+    """
+    samples, sample_rate = decode_audio(data)
+    segments = plan_segments(
+        samples,
+        sample_rate,
+        segment_seconds or settings.TRANSCRIPTION_SEGMENT_SECONDS,
+        settings.TRANSCRIPTION_SEGMENT_OVERLAP_SECONDS if overlap_seconds is None else overlap_seconds,
+    )
+    return [encode_audio(samples[start:end], sample_rate, codec) for start, end in segments]
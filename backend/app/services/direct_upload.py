@@ -0,0 +1,210 @@
+import logging
+import math
+import mimetypes
+import uuid
+from datetime import timedelta
+from typing import List, Optional, Tuple
+from urllib.parse import unquote_plus
+
+import inngest
+from sqlalchemy.exc import IntegrityError
+from app.core.audio_files import AUDIO_EXTENSIONS, audio_extension
+from app.core.config import settings
+from app.core.metrics import track_stage, VOICEMAILS_INGESTED
+from app.db.storage import async_db
+from app.models.voicemail import utcnow
+from app.services.events import voicemail_events
+from app.services.object_storage import object_storage
+from app.services.dispatch import dispatcher
+
+logger = logging.getLogger(__name__)
+
+# Clients write here directly; the API only ever registers keys under this prefix
+INCOMING_PREFIX = "incoming/"
+# S3 limit on parts per multipart upload
+MAX_PARTS = 10000
+
+def upload_key(file_id: str, filename: str) -> str:
+    return f"{INCOMING_PREFIX}{file_id}{audio_extension(filename)}"
+
+def parse_upload_key(key: str) -> Optional[str]:
+    """
+    Returns the voicemail id encoded in an upload key, or None for any other object.
+    """
+    if not key.startswith(INCOMING_PREFIX):
+        return None
+    name = key[len(INCOMING_PREFIX):]
+    file_id, dot, extension = name.rpartition(".")
+    if not dot or f".{extension}" not in AUDIO_EXTENSIONS:
+        return None
+    try:
+        parsed = str(uuid.UUID(file_id))
+    except ValueError:
+        return None
+    # Canonical form only, so one voicemail can't be registered under two keys
+    return parsed if parsed == file_id else None
+
+def _check_key(file_id: str, key: str):
+    if parse_upload_key(key) != file_id:
+        raise ValueError("Upload key does not belong to this voicemail")
+
+def _expiry() -> timedelta:
+    return timedelta(seconds=settings.DIRECT_UPLOAD_URL_EXPIRY_SECONDS)
+
+def _part_count(size: int) -> int:
+    return math.ceil(size / settings.DIRECT_UPLOAD_PART_SIZE)
+
+def _part_urls(key: str, upload_id: str, part_numbers: List[int]) -> List[dict]:
+    return [
+        {"part_number": number, "url": object_storage.presigned_part_url(key, upload_id, number, _expiry())}
+        for number in sorted(set(part_numbers))
+    ]
+
+async def start_upload(filename: str, size: int, content_type: Optional[str] = None) -> dict:
+    """
+    Reserves a voicemail id and returns where to PUT the audio: one presigned URL
+    when it fits in a single part, otherwise a multipart upload with one URL per part.
+    No row exists until the upload is completed.
+    """
+    if size > settings.DIRECT_UPLOAD_MAX_BYTES:
+        raise ValueError(f"File too large: {size} bytes (limit {settings.DIRECT_UPLOAD_MAX_BYTES})")
+    if _part_count(size) > MAX_PARTS:
+        raise ValueError(f"File needs more than {MAX_PARTS} parts; raise DIRECT_UPLOAD_PART_SIZE")
+
+    file_id = str(uuid.uuid4())
+    key = upload_key(file_id, filename)
+    content_type = content_type or mimetypes.guess_type(key)[0] or "application/octet-stream"
+    result = {
+        "id": file_id,
+        "key": key,
+        "headers": {"Content-Type": content_type},
+        "expires_in": settings.DIRECT_UPLOAD_URL_EXPIRY_SECONDS,
+    }
+    if size <= settings.DIRECT_UPLOAD_PART_SIZE:
+        return {**result, "method": "PUT", "url": object_storage.presigned_put_url(key, _expiry())}
+
+    with track_stage("create_multipart", pipeline="direct_upload"):
+        upload_id = await object_storage.create_multipart_upload(key, content_type)
+    return {
+        **result,
+        "method": "MULTIPART",
+        "upload_id": upload_id,
+        "part_size": settings.DIRECT_UPLOAD_PART_SIZE,
+        # Part headers are not signed; only the initiating call sets the content type
+        "headers": {},
+        "parts": _part_urls(key, upload_id, list(range(1, _part_count(size) + 1))),
+    }
+
+async def resume_upload(file_id: str, key: str, upload_id: str, part_numbers: Optional[List[int]] = None, size: Optional[int] = None) -> dict:
+    """
+    State of an interrupted multipart upload: the parts storage already has
+    (with their ETags, for the completion call) and fresh URLs for the rest.
+    """
+    _check_key(file_id, key)
+    if part_numbers is None and size is None:
+        raise ValueError("Pass part_numbers or the total size")
+    uploaded = await object_storage.list_parts(key, upload_id)
+    if part_numbers is None:
+        done = {number for number, _, _ in uploaded}
+        part_numbers = [number for number in range(1, _part_count(size) + 1) if number not in done]
+    if any(number < 1 or number > MAX_PARTS for number in part_numbers):
+        raise ValueError(f"Part numbers must be between 1 and {MAX_PARTS}")
+    return {
+        "id": file_id,
+        "key": key,
+        "upload_id": upload_id,
+        "uploaded": [{"part_number": number, "etag": etag, "size": size} for number, etag, size in uploaded],
+        "parts": _part_urls(key, upload_id, part_numbers),
+        "expires_in": settings.DIRECT_UPLOAD_URL_EXPIRY_SECONDS,
+    }
+
+async def complete_upload(file_id: str, key: str, upload_id: Optional[str] = None, parts: Optional[List[Tuple[int, str]]] = None):
+    """
+    Assembles a multipart upload (if any) and registers the voicemail.
+    Safe to repeat: once the row exists the stored voicemail is returned as is.
+    """
+    _check_key(file_id, key)
+    existing = await async_db.get_voicemail(file_id)
+    if existing:
+        return existing
+    if upload_id:
+        if not parts:
+            parts = [(number, etag) for number, etag, _ in await object_storage.list_parts(key, upload_id)]
+        if not parts:
+            raise ValueError("No parts uploaded")
+        with track_stage("complete_multipart", pipeline="direct_upload"):
+            await object_storage.complete_multipart_upload(key, upload_id, parts)
+    vm, _ = await register_upload(file_id, key, source="direct")
+    return vm
+
+async def register_upload(file_id: str, key: str, source: str = "direct"):
+    """
+    Creates the voicemail row for an object already in storage and starts the
+    workflow. Completion calls and bucket notifications may race on the same
+    object; whichever inserts first dispatches, the other gets the row back.
+    Returns (voicemail, created).
+    """
+    existing = await async_db.get_voicemail(file_id)
+    if existing:
+        return existing, False
+    try:
+        stat = await object_storage.stat_object(key)
+    except Exception as e:
+        raise ValueError(f"Upload not found in storage: {str(e)}")
+    if stat.size > settings.DIRECT_UPLOAD_MAX_BYTES:
+        # The presigned PUT can't cap the body size, so enforce the limit here
+        await object_storage.remove_object(key)
+        raise ValueError(f"File too large: {stat.size} bytes (limit {settings.DIRECT_UPLOAD_MAX_BYTES})")
+
+    try:
+        with track_stage("db_save", pipeline="direct_upload"):
+            # audio_sha256 is left empty: the workflow hashes the stored object itself
+            vm = await async_db.save_voicemail({
+                "id": file_id,
+                "status": "PROCESSING",
+                "file_path": key,
+                "created_at": utcnow(),
+            })
+    except IntegrityError:
+        return await async_db.get_voicemail(file_id), False
+    voicemail_events.publish_voicemail(vm)
+
+    try:
+        with track_stage("event_send", pipeline="direct_upload"):
+            await dispatcher.send(
+                inngest.Event(name="voicemail/received", data={"file_id": file_id, "file_path": key})
+            )
+    except Exception as e:
+        logger.error(f"Event send failed for {file_id}: {str(e)}")
+        vm = await async_db.update_voicemail(file_id, {"status": "FAILED", "analysis": {"error": f"Event send failed: {str(e)}"}})
+        voicemail_events.publish_voicemail(vm)
+        raise
+    VOICEMAILS_INGESTED.labels(source).inc()
+    return vm, True
+
+async def handle_storage_event(payload: dict) -> List[str]:
+    """
+    Registers voicemails from an S3/MinIO bucket notification (ObjectCreated).
+    Objects outside the upload prefix or bucket are ignored.
+    Returns the ids of newly created voicemails.
+    """
+    created = []
+    for record in payload.get("Records") or []:
+        if "ObjectCreated:" not in record.get("eventName", ""):
+            continue
+        s3 = record.get("s3") or {}
+        if (s3.get("bucket") or {}).get("name") != object_storage.bucket:
+            continue
+        # Notification keys are URL-encoded
+        key = unquote_plus((s3.get("object") or {}).get("key", ""))
+        file_id = parse_upload_key(key)
+        if file_id is None:
+            continue
+        try:
+            _, was_created = await register_upload(file_id, key, source="notification")
+        except ValueError as e:
+            logger.warning(f"Ignoring storage event for {key}: {str(e)}")
+            continue
+        if was_created:
+            created.append(file_id)
+    return created
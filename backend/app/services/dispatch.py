@@ -0,0 +1,35 @@
+import logging
+from typing import List, Union
+
+import inngest
+from app.core.config import settings
+from app.inngest_client import inngest_client, process_voicemail
+from app.services.worker import embedded_worker
+
+logger = logging.getLogger(__name__)
+
+class EventDispatcher:
+    """
+    Sends workflow events to the configured execution backend: the Inngest
+    server, or the in-process embedded worker (EXECUTION_BACKEND=embedded).
+    """
+    def __init__(self, backend: str = None):
+        self.backend = backend or settings.EXECUTION_BACKEND
+
+    @property
+    def embedded(self) -> bool:
+        return self.backend == "embedded"
+
+    async def send(self, events: Union[inngest.Event, List[inngest.Event]]) -> List[str]:
+        events = events if isinstance(events, list) else [events]
+        if self.embedded:
+            return await embedded_worker.enqueue(events)
+        return await inngest_client.send(events)
+
+# Event batching is an Inngest feature, so the embedded backend always runs
+# the per-voicemail workflow regardless of TRIAGE_MODE
+embedded_worker.register("voicemail/received", process_voicemail)
+if settings.EXECUTION_BACKEND == "embedded" and settings.TRIAGE_MODE == "batch":
+    logger.warning("TRIAGE_MODE=batch is not supported by the embedded backend; using single mode")
+
+dispatcher = EventDispatcher()
@@ -0,0 +1,105 @@
+import asyncio
+import json
+import logging
+from typing import AsyncIterator, Awaitable, Callable, Optional, Set
+
+from app.db.session import async_engine
+
+logger = logging.getLogger(__name__)
+
+# Postgres channel fed by the voicemails_notify trigger (migration 0006)
+NOTIFY_CHANNEL = "voicemail_events"
+
+class VoicemailEventBroker:
+    """
+    Fan-out of voicemail status changes to Server-Sent Event streams.
+
+    On Postgres every insert/update of a voicemail is NOTIFYed by a trigger in
+    the same transaction, and each process LISTENs on one connection, so a
+    change written by any worker or instance reaches every stream. Elsewhere
+    (SQLite: one process) `publish` fans out in-process. Either way clients
+    resync through the change feed after a reconnect.
+    """
+    def __init__(self, queue_size: int = 100, shared: Optional[bool] = None):
+        self.queue_size = queue_size
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.shared = async_engine.dialect.name == "postgresql" if shared is None else shared
+        self._listener: Optional[asyncio.Task] = None
+
+    def _fan_out(self, event: dict):
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Slow consumer: drop the event rather than block the publisher
+                logger.warning("Dropping voicemail event for slow SSE subscriber")
+
+    def publish(self, event: dict):
+        # With a shared channel the database trigger already announced the write
+        if not self.shared:
+            self._fan_out(event)
+
+    def publish_voicemail(self, vm):
+        self.publish({"id": vm.id, "status": vm.status, "urgency": vm.urgency, "updated_at": vm.updated_at.isoformat() if vm.updated_at else None})
+
+    def _on_notify(self, connection, pid, channel, payload: str):
+        try:
+            self._fan_out(json.loads(payload))
+        except ValueError:
+            logger.warning(f"Ignoring malformed voicemail notification: {payload[:200]}")
+
+    async def _listen(self, retry_delay: float = 5.0):
+        """
+        Holds one LISTEN connection for this process, reconnecting if it drops.
+        """
+        while True:
+            try:
+                async with async_engine.connect() as connection:
+                    raw = (await connection.get_raw_connection()).driver_connection
+                    closed = asyncio.Event()
+                    raw.add_termination_listener(lambda _: closed.set())
+                    await raw.add_listener(NOTIFY_CHANNEL, self._on_notify)
+                    logger.info(f"Listening for voicemail events on {NOTIFY_CHANNEL}")
+                    await closed.wait()
+                    connection.invalidate()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Voicemail event listener failed: {str(e)}")
+            await asyncio.sleep(retry_delay)
+
+    def _ensure_listener(self):
+        # Started by the first stream, so processes that never serve SSE hold no connection
+        if self.shared and (self._listener is None or self._listener.done()):
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+
+    async def subscribe(self, keepalive: float = 15.0, ready: Optional[Callable[[], Awaitable[dict]]] = None) -> AsyncIterator[str]:
+        """
+        Yields SSE-formatted frames until the consumer stops iterating. `ready` is
+        awaited once subscribed and sent as the first frame, so nothing published
+        after it is computed can be missed.
+        """
+        self._ensure_listener()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self.subscribers.add(queue)
+        try:
+            if ready is not None:
+                yield f"event: ready\ndata: {json.dumps(await ready())}\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    # Comment frame keeps proxies from closing an idle stream
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: voicemail\ndata: {json.dumps(event)}\n\n"
+        finally:
+            self.subscribers.discard(queue)
+
+voicemail_events = VoicemailEventBroker()
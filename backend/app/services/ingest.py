@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import mimetypes
+import os
+import uuid
+import zipfile
+from functools import partial
+from typing import BinaryIO, Callable, List, Tuple
+
+import inngest
+from app.core.audio_files import audio_extension, is_audio_file
+from app.core.config import settings
+from app.core.metrics import track_stage, VOICEMAILS_INGESTED
+from app.db.storage import async_db
+from app.models.voicemail import utcnow
+from app.services.events import voicemail_events
+from app.services.object_storage import object_storage, HashingReader
+from app.services.dispatch import dispatcher
+
+logger = logging.getLogger(__name__)
+
+ZIP_CONTENT_TYPES = {"application/zip", "application/x-zip-compressed"}
+
+# (display name, opener returning a readable file object, length or -1 if unknown)
+AudioSource = Tuple[str, Callable[[], BinaryIO], int]
+
+def _is_archive(name: str, content_type: str) -> bool:
+    return name.lower().endswith(".zip") or content_type in ZIP_CONTENT_TYPES
+
+def expand_uploads(uploads) -> Tuple[List[AudioSource], List[dict]]:
+    """
+    Flattens uploaded files and zip archives into audio sources.
+    Archive members are opened lazily so only the ones being uploaded are read.
+    Returns (sources, failures) where failures are per-item results for unreadable archives.
+    """
+    sources: List[AudioSource] = []
+    failures: List[dict] = []
+    for upload in uploads:
+        name = upload.filename or "upload"
+        if not _is_archive(name, upload.content_type):
+            sources.append((name, lambda file=upload.file: file, -1))
+            continue
+        try:
+            archive = zipfile.ZipFile(upload.file)
+        except zipfile.BadZipFile as e:
+            failures.append({"filename": name, "status": "failed", "error": f"Invalid archive: {str(e)}"})
+            continue
+        for info in archive.infolist():
+            member = os.path.basename(info.filename)
+            # Skip folders, OS metadata (__MACOSX/, ._foo.wav) and non-audio files
+            if info.is_dir() or member.startswith(".") or "__MACOSX" in info.filename:
+                continue
+            if not is_audio_file(member):
+                continue
+            sources.append((f"{name}/{info.filename}", partial(archive.open, info), info.file_size))
+    return sources, failures
+
+async def _upload(source: AudioSource, semaphore: asyncio.Semaphore) -> dict:
+    name, opener, length = source
+    file_id = str(uuid.uuid4())
+    filename = f"{file_id}{audio_extension(name)}"
+    content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    async with semaphore:
+        try:
+            reader = HashingReader(opener())
+            await object_storage.put_object(filename, reader, length=length, content_type=content_type)
+        except Exception as e:
+            logger.error(f"Storage upload failed for {name}: {str(e)}")
+            return {"filename": name, "status": "failed", "error": f"Storage upload failed: {str(e)}"}
+    return {"filename": name, "id": file_id, "file_path": filename, "audio_sha256": reader.hexdigest(), "status": "queued"}
+
+async def bulk_ingest(sources: List[AudioSource]) -> List[dict]:
+    """
+    Uploads every source concurrently, inserts all rows with one bulk INSERT and
+    dispatches the voicemail/received events in batched sends.
+    Returns one result per source, in input order.
+    """
+    semaphore = asyncio.Semaphore(settings.BULK_UPLOAD_CONCURRENCY)
+    with track_stage("storage_put", pipeline="bulk_ingest"):
+        results = await asyncio.gather(*(_upload(source, semaphore) for source in sources))
+    uploaded = [result for result in results if result["status"] == "queued"]
+    if not uploaded:
+        return list(results)
+
+    now = utcnow()
+    with track_stage("db_save", pipeline="bulk_ingest"):
+        await async_db.bulk_save_voicemails([
+            {"id": item["id"], "status": "PROCESSING", "file_path": item["file_path"],
+             "created_at": now, "audio_sha256": item["audio_sha256"]}
+            for item in uploaded
+        ])
+    for item in uploaded:
+        voicemail_events.publish({"id": item["id"], "status": "PROCESSING", "urgency": None, "updated_at": now.isoformat()})
+
+    # One request per chunk instead of one per file; chunks keep payloads under the event API limit
+    size = settings.BULK_EVENT_BATCH_SIZE
+    for start in range(0, len(uploaded), size):
+        chunk = uploaded[start:start + size]
+        try:
+            with track_stage("event_send", pipeline="bulk_ingest"):
+                await dispatcher.send([
+                    inngest.Event(
+                        name="voicemail/received",
+                        data={"file_id": item["id"], "file_path": item["file_path"], "audio_sha256": item["audio_sha256"]}
+                    )
+                    for item in chunk
+                ])
+            VOICEMAILS_INGESTED.labels("bulk").inc(len(chunk))
+        except Exception as e:
+            logger.error(f"Event send failed for {len(chunk)} voicemails: {str(e)}")
+            await async_db.bulk_update_voicemails([
+                {"id": item["id"], "status": "FAILED", "analysis": {"error": f"Event send failed: {str(e)}"}}
+                for item in chunk
+            ])
+            for item in chunk:
+                item.update({"status": "failed", "error": f"Event send failed: {str(e)}"})
+
+    return list(results)
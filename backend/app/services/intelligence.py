@@ -1,25 +1,27 @@
-from typing import Dict, Any, Optional
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import PydanticOutputParser
+import asyncio
+import hashlib
+import logging
+from functools import cached_property
+from typing import TYPE_CHECKING, Dict, Any, Optional, Set
+from pydantic import ValidationError
+from app.core.cache import LRUCache
 from app.core.config import settings
-from app.models.voicemail import AnalysisExtraction
+from app.core.metrics import LLM_IN_FLIGHT, LLM_RATE_LIMITED
+from app.core.ratelimit import AdaptiveRateLimiter
+from app.models.voicemail import AnalysisExtraction, BatchAnalysisItem, BatchAnalysisExtraction
 
-class IntelligenceService:
-    def __init__(self):
-        self.llm = ChatOpenAI(
-            model="gpt-4-turbo-preview", 
-            temperature=0, 
-            openai_api_key=settings.OPENAI_API_KEY
-        )
-        self.parser = PydanticOutputParser(pydantic_object=AnalysisExtraction)
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
 
-    def analyze_transcript(self, transcript: str) -> dict:
-        if not settings.OPENAI_API_KEY:
-             return {"intent": "Error", "summary": "Missing API Key"}
+logger = logging.getLogger(__name__)
 
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", """You are an expert medical triage AI. Analyze the voicemail transcript and extract structured data. 
+LLM_MODEL = "gpt-4-turbo-preview"
+
+# Bump whenever SYSTEM_PROMPT or AnalysisExtraction changes: it is part of the
+# analysis cache key, so older cached results stop matching automatically.
+PROMPT_VERSION = "1"
+
+SYSTEM_PROMPT = """You are an expert medical triage AI. Analyze the voicemail transcript and extract structured data. 
             
             Key Guidelines:
             1. Extract `symptoms` and `appointment_time` if mentioned.
@@ -30,23 +32,183 @@ class IntelligenceService:
             3. If critical info is missing (e.g. Patient Name, Symptoms), set `urgency` to "NEED_VALIDATION" AND list the missing fields in `missing_info`.
             4. Otherwise, use RED/YELLOW/GREEN based on medical urgency.
             
-            Format instructions: {format_instructions}"""),
+            Format instructions: {format_instructions}"""
+
+BATCH_USER_PROMPT = """Analyze each of the following voicemail transcripts independently.
+            Return exactly one item per transcript and copy its `voicemail_id` from the header above it.
+
+            {transcripts}"""
+
+# Process-wide backpressure for LLM calls made through `aanalyze_transcript`
+llm_limiter = AdaptiveRateLimiter(
+    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+)
+# Read at scrape time: no bookkeeping on the request path
+LLM_IN_FLIGHT.set_function(lambda: llm_limiter.in_flight)
+
+class IntelligenceService:
+    """
+    LangChain and the OpenAI SDK take most of the app's import time, so they are
+    imported, and the model and chains built, on first use rather than at startup.
+    """
+    def __init__(self, llm: Optional["ChatOpenAI"] = None):
+        # `llm` lets benchmarks point the chains at a local stand-in
+        if llm is not None:
+            self.llm = llm
+        self.cache = LRUCache(maxsize=settings.ANALYSIS_CACHE_SIZE, ttl=settings.ANALYSIS_CACHE_TTL)
+
+    @cached_property
+    def llm(self) -> "ChatOpenAI":
+        from langchain_openai import ChatOpenAI
+
+        return ChatOpenAI(
+            model=LLM_MODEL, 
+            temperature=0, 
+            openai_api_key=settings.OPENAI_API_KEY,
+            # Rate limits are handled by llm_limiter, not by blind SDK retries
+            max_retries=settings.LLM_SDK_MAX_RETRIES
+        )
+
+    @cached_property
+    def chain(self):
+        from langchain_core.prompts import ChatPromptTemplate
+        from langchain_core.output_parsers import PydanticOutputParser
+
+        # Format instructions are baked in as a partial
+        parser = PydanticOutputParser(pydantic_object=AnalysisExtraction)
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", SYSTEM_PROMPT),
             ("user", "Transcript: {transcript}")
-        ])
-        
-        chain = prompt | self.llm | self.parser
-        
+        ]).partial(format_instructions=parser.get_format_instructions())
+        return prompt | self.llm | parser
+
+    @cached_property
+    def batch_chain(self):
+        from langchain_core.prompts import ChatPromptTemplate
+        from langchain_core.output_parsers import PydanticOutputParser, JsonOutputParser
+
+        # Multi-item variant for batch triage; parsed to plain JSON so that one
+        # malformed item doesn't throw away the rest of the batch
+        batch_parser = PydanticOutputParser(pydantic_object=BatchAnalysisExtraction)
+        batch_prompt = ChatPromptTemplate.from_messages([
+            ("system", SYSTEM_PROMPT),
+            ("user", BATCH_USER_PROMPT)
+        ]).partial(format_instructions=batch_parser.get_format_instructions())
+        return batch_prompt | self.llm | JsonOutputParser()
+
+    def cache_key(self, transcript: str) -> str:
+        # Whitespace-insensitive, and scoped to the prompt/model that produced the result
+        normalized = " ".join(transcript.split())
+        return hashlib.sha256(f"{PROMPT_VERSION}|{LLM_MODEL}|{normalized}".encode()).hexdigest()
+
+    def clear_cache(self):
+        self.cache.clear()
+
+    def _error_result(self, e: Exception) -> dict:
+        """
+        Stand-in analysis for model output that can't be parsed. Only used for
+        ValueError (OutputParserException, pydantic ValidationError, bad JSON):
+        API failures (timeouts, connection resets, 5xx, 429) are raised so the
+        step is retried instead of storing a made-up triage.
+        """
+        return {
+            "intent": "Error", 
+            "urgency": "YELLOW", 
+            "summary": f"Analysis failed: {str(e)}"
+        }
+
+    async def _ainvoke_limited(self, chain, inputs: dict):
+        """
+        Runs `chain.ainvoke` through `llm_limiter`, backing off on rate limits.
+        """
+        from openai import RateLimitError
+
+        attempt = 0
+        while True:
+            try:
+                async with llm_limiter.slot():
+                    return await chain.ainvoke(inputs)
+            except RateLimitError as e:
+                LLM_RATE_LIMITED.inc()
+                headers = e.response.headers if e.response is not None else None
+                delay = llm_limiter.backoff(attempt, headers)
+                # Long provider-mandated pauses are better spent off the worker
+                if attempt >= settings.LLM_MAX_RETRIES or delay > llm_limiter.max_backoff:
+                    raise
+                logger.warning(f"LLM rate limited, pausing {delay:.1f}s (attempt {attempt + 1})")
+                attempt += 1
+
+    async def aanalyze_transcript(self, transcript: str, use_cache: bool = True) -> dict:
+        """
+        Non-blocking analysis. Calls go through `llm_limiter` (global concurrency
+        cap + token-bucket pacing); on 429 every caller pauses for the time the
+        provider asks for. Raises RateLimitError once LLM_MAX_RETRIES is exhausted
+        (or the requested pause is too long to wait in-process) so the
+        orchestrator can reschedule instead of recording a failed analysis;
+        other API errors are raised as is for the step-level retry.
+        Set `use_cache=False` to force a fresh LLM call (re-triage); the new
+        result still replaces the cached one.
+        """
+        if not settings.OPENAI_API_KEY:
+             return {"intent": "Error", "summary": "Missing API Key"}
+
+        key = self.cache_key(transcript)
+        if use_cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return dict(cached)
+
         try:
-            result = chain.invoke({
-                "transcript": transcript,
-                "format_instructions": self.parser.get_format_instructions()
-            })
-            return result.model_dump()
-        except Exception as e:
-            return {
-                "intent": "Error", 
-                "urgency": "YELLOW", 
-                "summary": f"Analysis failed: {str(e)}"
-            }
+            result = (await self._ainvoke_limited(self.chain, {"transcript": transcript})).model_dump()
+        except ValueError as e:
+            return self._error_result(e)
+        self.cache.set(key, result)
+        return dict(result)
+
+    async def aanalyze_batch(self, transcripts: Dict[str, str], skip_cache_ids: Optional[Set[str]] = None) -> Dict[str, dict]:
+        """
+        Analyzes many transcripts ({voicemail_id: transcript}) in a single LLM request.
+        Cached results are reused; items missing from or malformed in the batch
+        response fall back to one `aanalyze_transcript` call each. API errors are
+        raised, as in `aanalyze_transcript`.
+        """
+        if not settings.OPENAI_API_KEY:
+             return {vm_id: {"intent": "Error", "summary": "Missing API Key"} for vm_id in transcripts}
+
+        skip_cache_ids = skip_cache_ids or set()
+        results: Dict[str, dict] = {}
+        pending: Dict[str, str] = {}
+        for vm_id, transcript in transcripts.items():
+            cached = None if vm_id in skip_cache_ids else self.cache.get(self.cache_key(transcript))
+            if cached is not None:
+                results[vm_id] = dict(cached)
+            else:
+                pending[vm_id] = transcript
+
+        if len(pending) > 1:
+            formatted = "\n\n".join(f"### voicemail_id: {vm_id}\n{transcript}" for vm_id, transcript in pending.items())
+            try:
+                response = await self._ainvoke_limited(self.batch_chain, {"transcripts": formatted})
+                items = response.get("items", []) if isinstance(response, dict) else []
+            except ValueError as e:
+                logger.warning(f"Batch analysis unparseable, falling back to per-item: {str(e)}")
+                items = []
+
+            for item in items:
+                try:
+                    parsed = BatchAnalysisItem.model_validate(item)
+                except ValidationError:
+                    continue
+                if parsed.voicemail_id in pending and parsed.voicemail_id not in results:
+                    result = parsed.model_dump(exclude={"voicemail_id"})
+                    self.cache.set(self.cache_key(pending[parsed.voicemail_id]), result)
+                    results[parsed.voicemail_id] = dict(result)
+
+        # Per-item fallback for anything the batch didn't cover
+        missing = [vm_id for vm_id in pending if vm_id not in results]
+        fallback = await asyncio.gather(*(self.aanalyze_transcript(pending[vm_id], use_cache=False) for vm_id in missing))
+        results.update(zip(missing, fallback))
+        return results
 
 intelligence_service = IntelligenceService()
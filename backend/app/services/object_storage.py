@@ -0,0 +1,241 @@
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import partial
+from typing import TYPE_CHECKING, AsyncIterator, List, Optional, Tuple
+
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from minio import Minio
+
+logger = logging.getLogger(__name__)
+
+class HashingReader:
+    """
+    File-like wrapper that computes a SHA-256 of everything read through it,
+    so uploads are hashed in the same pass that streams them to storage.
+    """
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self._hash = hashlib.sha256()
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self.fileobj.read(size)
+        self._hash.update(chunk)
+        return chunk
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+class ObjectStorage:
+    """
+    Async facade over the MinIO/S3 client.
+
+    Blocking SDK calls run on a dedicated, bounded thread pool so uploads and
+    playback never stall the event loop, and all callers share one HTTP
+    connection pool instead of building their own clients.
+    """
+    def __init__(self, bucket: Optional[str] = None, client: Optional["Minio"] = None):
+        self.bucket = bucket or settings.MINIO_BUCKET
+        self._client = client
+        self._presign_client = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.STORAGE_MAX_WORKERS,
+            thread_name_prefix="object-storage",
+        )
+
+    @property
+    def client(self) -> "Minio":
+        if self._client is None:
+            # Imported here so the SDK isn't loaded until storage is first used
+            import certifi
+            import urllib3
+            from minio import Minio
+
+            # Same defaults as Minio's own pool manager, but with a configurable size
+            http_client = urllib3.PoolManager(
+                timeout=urllib3.Timeout(connect=settings.MINIO_CONNECT_TIMEOUT, read=settings.MINIO_READ_TIMEOUT),
+                maxsize=settings.MINIO_POOL_SIZE,
+                cert_reqs="CERT_REQUIRED",
+                ca_certs=os.environ.get("SSL_CERT_FILE") or certifi.where(),
+                retries=urllib3.Retry(total=5, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504]),
+            )
+            self._client = Minio(
+                settings.MINIO_ENDPOINT,
+                access_key=settings.MINIO_ACCESS_KEY,
+                secret_key=settings.MINIO_SECRET_KEY,
+                secure=settings.MINIO_USE_SSL,
+                http_client=http_client,
+            )
+        return self._client
+
+    @property
+    def presign_client(self) -> "Minio":
+        """
+        Signs URLs for the public endpoint. Signing is local (the region is
+        preset, so no bucket-location lookup); this client never sends requests.
+        """
+        if self._presign_client is None:
+            from minio import Minio
+
+            endpoint = settings.MINIO_PUBLIC_ENDPOINT or settings.MINIO_ENDPOINT
+            secure = endpoint.startswith("https://") or (settings.MINIO_USE_SSL and not endpoint.startswith("http://"))
+            self._presign_client = Minio(
+                endpoint.replace("https://", "").replace("http://", "").rstrip("/"),
+                access_key=settings.MINIO_ACCESS_KEY,
+                secret_key=settings.MINIO_SECRET_KEY,
+                secure=secure,
+                region=settings.MINIO_REGION,
+            )
+        return self._presign_client
+
+    async def _run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(fn, *args, **kwargs))
+
+    async def ensure_bucket(self):
+        """
+        Create the bucket if missing. Called once at startup (Local Dev/MinIO only);
+        in Prod (S3) we assume it exists to avoid 'AccessDenied' on ListBuckets.
+        """
+        if settings.MINIO_USE_SSL:
+            return
+        if not await self._run(self.client.bucket_exists, self.bucket):
+            logger.info(f"Bucket {self.bucket} not found, creating...")
+            await self._run(self.client.make_bucket, self.bucket)
+
+    async def put_object(self, key: str, data, length: int = -1, part_size: int = 10*1024*1024, content_type: str = "audio/wav"):
+        return await self._run(
+            self.client.put_object,
+            self.bucket,
+            key,
+            data,
+            length=length,
+            part_size=part_size,
+            content_type=content_type,
+        )
+
+    async def download_spooled(self, key: str, max_memory: Optional[int] = None, chunk_size: int = 1024*1024):
+        """
+        Downloads an object into a SpooledTemporaryFile positioned at 0.
+        Stays in memory up to `max_memory` bytes and only spills to disk beyond that.
+        """
+        spool = tempfile.SpooledTemporaryFile(max_size=max_memory or settings.TRANSCRIPTION_SPOOL_MAX_BYTES)
+        try:
+            await self._run(self._download_into, key, spool, chunk_size)
+        except Exception:
+            spool.close()
+            raise
+        spool.seek(0)
+        return spool
+
+    def _download_into(self, key: str, fileobj, chunk_size: int):
+        response = self.client.get_object(self.bucket, key)
+        try:
+            for chunk in response.stream(chunk_size):
+                fileobj.write(chunk)
+        finally:
+            response.close()
+            response.release_conn()
+
+    def presigned_put_url(self, key: str, expires: timedelta) -> str:
+        return self.presign_client.presigned_put_object(self.bucket, key, expires=expires)
+
+    def presigned_part_url(self, key: str, upload_id: str, part_number: int, expires: timedelta) -> str:
+        return self.presign_client.get_presigned_url(
+            "PUT",
+            self.bucket,
+            key,
+            expires=expires,
+            extra_query_params={"partNumber": str(part_number), "uploadId": upload_id},
+        )
+
+    # Multipart primitives: the Minio SDK only exposes them as underscore methods
+    # (its own put_object drives them), but they map 1:1 onto the S3 API calls
+    async def create_multipart_upload(self, key: str, content_type: str) -> str:
+        return await self._run(self.client._create_multipart_upload, self.bucket, key, {"Content-Type": content_type})
+
+    async def list_parts(self, key: str, upload_id: str) -> List[Tuple[int, str, int]]:
+        """
+        Parts already uploaded, as (part_number, etag, size); up to 1000 (S3's page size).
+        """
+        result = await self._run(self.client._list_parts, self.bucket, key, upload_id)
+        return [(part.part_number, part.etag, part.size) for part in result.parts]
+
+    async def complete_multipart_upload(self, key: str, upload_id: str, parts: List[Tuple[int, str]]):
+        from minio.datatypes import Part
+
+        return await self._run(
+            self.client._complete_multipart_upload,
+            self.bucket,
+            key,
+            upload_id,
+            [Part(part_number, etag) for part_number, etag in sorted(parts)],
+        )
+
+    async def remove_object(self, key: str):
+        return await self._run(self.client.remove_object, self.bucket, key)
+
+    async def remove_prefix(self, prefix: str) -> int:
+        """
+        Deletes every object under `prefix` with batched DeleteObjects calls.
+        Returns how many were listed; raises if any delete failed.
+        """
+        return await self._run(self._remove_prefix, prefix)
+
+    def _remove_prefix(self, prefix: str) -> int:
+        from minio.deleteobjects import DeleteObject
+
+        keys = [obj.object_name for obj in self.client.list_objects(self.bucket, prefix=prefix, recursive=True)]
+        # remove_objects is lazy: errors only surface while iterating
+        errors = list(self.client.remove_objects(self.bucket, (DeleteObject(key) for key in keys)))
+        if errors:
+            raise RuntimeError(f"Failed to delete {len(errors)} object(s) under {prefix}: {errors[0]}")
+        return len(keys)
+
+    async def sha256(self, key: str, chunk_size: int = 1024*1024) -> str:
+        """
+        SHA-256 of a stored object, streamed in chunks off the event loop.
+        """
+        return await self._run(self._hash_object, key, chunk_size)
+
+    def _hash_object(self, key: str, chunk_size: int) -> str:
+        digest = hashlib.sha256()
+        response = self.client.get_object(self.bucket, key)
+        try:
+            for chunk in response.stream(chunk_size):
+                digest.update(chunk)
+        finally:
+            response.close()
+            response.release_conn()
+        return digest.hexdigest()
+
+    async def stat_object(self, key: str):
+        return await self._run(self.client.stat_object, self.bucket, key)
+
+    async def get_object(self, key: str, offset: int = 0, length: int = 0):
+        """
+        Opens the object for reading; pair with `stream()` to consume it.
+        """
+        return await self._run(self.client.get_object, self.bucket, key, offset=offset, length=length)
+
+    async def stream(self, response, chunk_size: int = 1024*1024) -> AsyncIterator[bytes]:
+        """
+        Reads an open object response chunk by chunk off the event loop.
+        """
+        try:
+            while True:
+                chunk = await self._run(response.read, chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            response.close()
+            response.release_conn()
+
+object_storage = ObjectStorage()
@@ -0,0 +1,59 @@
+import logging
+from typing import Optional
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.db.storage import async_db
+
+logger = logging.getLogger(__name__)
+
+class TranscriptCache:
+    """
+    Content-addressed transcript cache: (audio SHA-256, ASR model) -> transcript.
+
+    Tier 1 is a per-process LRU; tier 2 is the `transcript_cache` table, which
+    survives restarts and is shared by every worker.
+    """
+    def __init__(self, maxsize: int = None):
+        self.memory = LRUCache(maxsize=maxsize or settings.TRANSCRIPT_CACHE_SIZE)
+        self.db_hits = 0
+        self.misses = 0
+
+    async def get(self, audio_sha256: str, model: str) -> Optional[str]:
+        key = (audio_sha256, model)
+        transcript = self.memory.get(key)
+        if transcript is not None:
+            return transcript
+
+        try:
+            transcript = await async_db.get_cached_transcript(audio_sha256, model)
+        except Exception as e:
+            # The cache is an optimization; never fail a transcription over it
+            logger.warning(f"Transcript cache lookup failed: {str(e)}")
+            transcript = None
+
+        if transcript is None:
+            self.misses += 1
+            return None
+        self.db_hits += 1
+        self.memory.set(key, transcript)
+        return transcript
+
+    async def set(self, audio_sha256: str, model: str, transcript: str):
+        self.memory.set((audio_sha256, model), transcript)
+        try:
+            await async_db.save_cached_transcript(audio_sha256, model, transcript)
+        except Exception as e:
+            logger.warning(f"Transcript cache write failed: {str(e)}")
+
+    def stats(self) -> dict:
+        memory_hits = self.memory.hits
+        lookups = memory_hits + self.db_hits + self.misses
+        return {
+            "memory_hits": memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "hit_ratio": (memory_hits + self.db_hits) / lookups if lookups else 0.0,
+            "memory_size": len(self.memory),
+        }
+
+transcript_cache = TranscriptCache()
@@ -1,19 +1,57 @@
+import asyncio
 import os
-from openai import AsyncOpenAI
+import re
+from typing import TYPE_CHECKING, BinaryIO, List, Optional
 from app.core.config import settings
+from app.core.metrics import ASR_IN_FLIGHT
 
-client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
 
-async def transcribe_audio(file_path: str, local_path: str) -> str:
+WHISPER_MODEL = "whisper-1"
+
+# Created on first use (see get_client); the OpenAI SDK is slow to import
+client: Optional["AsyncOpenAI"] = None
+
+def get_client() -> "AsyncOpenAI":
+    global client
+    if client is None:
+        from openai import AsyncOpenAI
+        client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+    return client
+
+# Caps concurrent Whisper requests per process (segments of long voicemails fan out)
+asr_semaphore = asyncio.Semaphore(settings.ASR_MAX_CONCURRENCY)
+
+async def transcribe_file(file_name: str, audio_file: BinaryIO) -> str:
     """
-    Transcribes audio using OpenAI Whisper model.
+    Transcribes an open audio stream (in-memory or on disk) using OpenAI Whisper.
+    `file_name` is only used by the API to infer the audio format.
     """
-    if not os.path.exists(local_path):
-        raise FileNotFoundError(f"Audio file not found: {local_path}")
-        
-    with open(local_path, "rb") as audio_file:
-        transcription = await client.audio.transcriptions.create(
-            model="whisper-1",
-            file=audio_file
-        )
+    async with asr_semaphore:
+        with ASR_IN_FLIGHT.track_inprogress():
+            transcription = await get_client().audio.transcriptions.create(
+                model=WHISPER_MODEL,
+                file=(os.path.basename(file_name), audio_file)
+            )
     return transcription.text
+
+def _norm_word(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+def stitch_transcripts(texts: List[str], max_overlap_words: int = 15) -> str:
+    """
+    Joins transcripts of overlapping segments in order, dropping the words at
+    the start of each segment that repeat the end of the previous one.
+    """
+    merged: List[str] = []
+    for text in texts:
+        words = text.split()
+        if not words:
+            continue
+        tail = [_norm_word(w) for w in merged[-max_overlap_words:]]
+        head = [_norm_word(w) for w in words[:max_overlap_words]]
+        # Longest suffix of what we have that equals a prefix of the new segment
+        overlap = next((k for k in range(min(len(tail), len(head)), 0, -1) if tail[-k:] == head[:k]), 0)
+        merged.extend(words[overlap:])
+    return " ".join(merged)
@@ -0,0 +1,75 @@
+import re
+from typing import List
+
+# Red-flag symptoms that warrant a provisional RED before the LLM has answered.
+# Deliberately conservative: a false positive is re-triaged by the LLM a few
+# seconds later, a false negative leaves an emergency unprioritized.
+RED_FLAG_PHRASES = [
+    # Cardiac
+    "chest pain", "chest pains", "chest tightness", "tight chest", "crushing chest",
+    "pain in my chest", "heart attack", "pain down my left arm",
+    # Breathing
+    "can't breathe", "cannot breathe", "can not breathe", "difficulty breathing",
+    "trouble breathing", "struggling to breathe", "short of breath", "shortness of breath",
+    "choking", "turning blue", "lips are blue",
+    # Neuro
+    "stroke", "face drooping", "drooping face", "slurred speech", "can't move my arm",
+    "sudden numbness", "worst headache", "thunderclap headache", "seizure", "seizures",
+    "fitting", "convulsing", "unconscious", "unresponsive", "passed out", "collapsed",
+    "fainted",
+    # Bleeding / trauma
+    "severe bleeding", "bleeding heavily", "won't stop bleeding", "coughing up blood",
+    "vomiting blood", "head injury",
+    # Allergy / infection
+    "anaphylaxis", "anaphylactic", "throat is swelling", "throat swelling", "tongue swelling",
+    "stiff neck", "non-blanching rash", "rash that doesn't fade",
+    # Mental health
+    "suicidal", "kill myself", "end my life", "want to die", "self harm", "self-harm",
+    "overdose", "overdosed",
+]
+
+_NEGATIONS = {
+    "no", "not", "without", "denies", "never",
+    "don't", "didn't", "doesn't", "isn't", "wasn't", "haven't", "hasn't",
+}
+# Compared with apostrophes removed, so "don't", "don’t" and ASR's "dont" all match
+_NEGATION_WORDS = {word.replace("'", "") for word in _NEGATIONS}
+_NEGATION_WINDOW = 3
+
+def _phrase_pattern(phrase: str) -> str:
+    # Tolerate ASR variations: any whitespace/hyphen between words, straight or curly apostrophes
+    words = [re.escape(word).replace("'", "['’]?") for word in re.split(r"[\s-]+", phrase)]
+    return r"[\s-]+".join(words)
+
+# One alternation, longest phrases first so "chest pains" wins over "chest pain"
+RED_FLAG_PATTERN = re.compile(
+    r"\b(?:" + "|".join(_phrase_pattern(p) for p in sorted(RED_FLAG_PHRASES, key=len, reverse=True)) + r")\b",
+    re.IGNORECASE,
+)
+
+def _is_negated(text: str, start: int) -> bool:
+    preceding = re.findall(r"[\w'’]+", text[max(0, start - 40):start].lower())
+    return any(re.sub(r"['’]", "", word) in _NEGATION_WORDS for word in preceding[-_NEGATION_WINDOW:])
+
+def find_red_flags(transcript: str) -> List[str]:
+    """
+    Red-flag phrases present in the transcript (deduplicated, in order of appearance),
+    skipping simple negations like "no chest pain".
+    """
+    if not transcript:
+        return []
+    flags: List[str] = []
+    for match in RED_FLAG_PATTERN.finditer(transcript):
+        phrase = re.sub(r"[\s-]+", " ", match.group(0).lower()).replace("’", "'")
+        if phrase not in flags and not _is_negated(transcript, match.start()):
+            flags.append(phrase)
+    return flags
+
+def provisional_urgency(transcript: str) -> dict:
+    """
+    Fast in-process triage run right after transcription. Returns the provisional
+    urgency (RED or None) and the phrases that triggered it; the LLM result in
+    update_state confirms or overrides it.
+    """
+    flags = find_red_flags(transcript)
+    return {"urgency": "RED" if flags else None, "red_flags": flags}
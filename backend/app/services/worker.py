@@ -0,0 +1,170 @@
+import asyncio
+import datetime
+import logging
+import uuid
+from typing import Dict, List, Optional
+
+import inngest
+from app.core.config import settings
+from app.db.storage import async_db
+from app.models.voicemail import utcnow
+
+logger = logging.getLogger(__name__)
+
+class DurableStep:
+    """
+    `ctx.step` for the embedded backend: same memoization contract as Inngest.
+    A step that already completed for this run returns its stored output;
+    otherwise it runs and its (JSON-serializable) output is persisted first.
+    """
+    def __init__(self, run_id: str, completed: dict):
+        self.run_id = run_id
+        self.completed = completed
+
+    async def run(self, step_id: str, fn, *args):
+        if step_id in self.completed:
+            return self.completed[step_id]
+        output = await fn(*args)
+        await async_db.save_workflow_step(self.run_id, step_id, output)
+        self.completed[step_id] = output
+        return output
+
+class StepGroup:
+    async def parallel(self, callables):
+        return tuple(await asyncio.gather(*(fn() for fn in callables)))
+
+class WorkerContext:
+    """
+    The subset of inngest.Context that our functions use.
+    """
+    def __init__(self, run_id: str, event: inngest.Event, attempt: int, completed: dict):
+        self.run_id = run_id
+        self.event = event
+        self.events = [event]
+        self.attempt = attempt
+        self.step = DurableStep(run_id, completed)
+        self.group = StepGroup()
+        self.logger = logger
+
+class EmbeddedWorker:
+    """
+    In-process execution backend: runs the same Inngest functions on a bounded
+    pool of asyncio workers, skipping the HTTP round-trip per step.
+
+    Runs and step outputs live in the database, so after a crash the unfinished
+    runs are re-queued on startup and resume after their last completed step.
+    Single-node only: two processes would both recover the same runs.
+    """
+    def __init__(self, functions: Optional[Dict[str, object]] = None):
+        # event name -> Inngest function (called through its handler)
+        self.functions = functions or {}
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self._tasks = []
+        self._pending = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    def register(self, event_name: str, function):
+        self.functions[event_name] = function
+
+    async def start(self):
+        if self._tasks:
+            return
+        for run in await async_db.list_unfinished_workflow_runs():
+            logger.info(f"Recovering workflow run {run.id} ({run.function})")
+            self._schedule(run.id)
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(settings.WORKER_CONCURRENCY)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def join(self):
+        """
+        Waits until every queued run (including scheduled retries) has finished.
+        """
+        await self._idle.wait()
+
+    async def enqueue(self, events: List[inngest.Event]) -> List[str]:
+        """
+        Persists one run per event (a single INSERT for the lot) and queues them.
+        Returns the run ids.
+        """
+        for event in events:
+            if event.name not in self.functions:
+                raise ValueError(f"No function registered for event {event.name}")
+        now = utcnow()
+        runs = [{
+            "id": event.id or str(uuid.uuid4()),
+            "function": event.name,
+            "event": {"name": event.name, "data": event.data},
+            "status": "PENDING",
+            "attempts": 0,
+            "created_at": now,
+            "updated_at": now,
+        } for event in events]
+        await async_db.bulk_save_workflow_runs(runs)
+        for run in runs:
+            self._schedule(run["id"])
+        return [run["id"] for run in runs]
+
+    def _schedule(self, run_id: str, delay: float = 0.0):
+        self._pending += 1
+        self._idle.clear()
+        if delay > 0:
+            asyncio.get_running_loop().call_later(delay, self.queue.put_nowait, run_id)
+        else:
+            self.queue.put_nowait(run_id)
+
+    def _done(self):
+        self._pending -= 1
+        if self._pending == 0:
+            self._idle.set()
+
+    async def _work(self):
+        while True:
+            run_id = await self.queue.get()
+            try:
+                await self._execute(run_id)
+            except Exception as e:
+                # Bookkeeping failure (e.g. DB down): retry the whole run later
+                logger.error(f"Workflow run {run_id} could not be executed: {str(e)}")
+                self._schedule(run_id, settings.WORKER_RETRY_BACKOFF_SECONDS)
+            finally:
+                self._done()
+                self.queue.task_done()
+
+    async def _execute(self, run_id: str):
+        run = await async_db.get_workflow_run(run_id)
+        if run is None or run.status in ("COMPLETED", "FAILED"):
+            return
+        attempt = run.attempts or 0
+        await async_db.update_workflow_run(run_id, {"status": "RUNNING", "attempts": attempt + 1})
+
+        event = inngest.Event(id=run.id, name=run.event["name"], data=run.event["data"])
+        completed = await async_db.get_workflow_steps(run_id)
+        ctx = WorkerContext(run_id, event, attempt, completed)
+
+        try:
+            await self.functions[run.function]._handler(ctx)
+        except inngest.RetryAfterError as e:
+            # Throttled upstream: not counted as a failed attempt
+            delay = max(0.0, (e.retry_after - datetime.datetime.now()).total_seconds())
+            await async_db.update_workflow_run(run_id, {"status": "PENDING", "attempts": attempt})
+            self._schedule(run_id, delay)
+            return
+        except Exception as e:
+            if attempt + 1 < settings.WORKER_MAX_ATTEMPTS:
+                delay = settings.WORKER_RETRY_BACKOFF_SECONDS * (2 ** attempt)
+                logger.warning(f"Workflow run {run_id} failed (attempt {attempt + 1}), retrying in {delay:.1f}s: {str(e)}")
+                await async_db.update_workflow_run(run_id, {"status": "PENDING", "error": str(e)})
+                self._schedule(run_id, delay)
+            else:
+                logger.error(f"Workflow run {run_id} failed permanently: {str(e)}")
+                await async_db.update_workflow_run(run_id, {"status": "FAILED", "error": str(e)})
+            return
+        await async_db.update_workflow_run(run_id, {"status": "COMPLETED", "error": None})
+
+embedded_worker = EmbeddedWorker()
@@ -0,0 +1,218 @@
+"""
+In-process stand-ins for the external services the pipeline talks to.
+None of them import the app, so they can be built before settings are loaded.
+"""
+import asyncio
+import datetime
+import io
+import json
+import math
+import random
+import time
+from types import SimpleNamespace
+from typing import Dict, List
+
+import httpx
+import inngest
+
+class Latency:
+    """
+    Log-normal latency: `median_ms` is the typical value, `sigma` the spread
+    (0 = constant). Real service latencies are long-tailed, not Gaussian.
+    """
+    def __init__(self, median_ms: float, sigma: float = 0.3):
+        self.median_ms = median_ms
+        self.sigma = sigma
+
+    def sample(self) -> float:
+        if self.median_ms <= 0:
+            return 0.0
+        return random.lognormvariate(math.log(self.median_ms), self.sigma) / 1000
+
+# --- Object storage -------------------------------------------------------
+
+class _ObjectResponse:
+    def __init__(self, data: bytes):
+        self._buffer = io.BytesIO(data)
+
+    def read(self, size: int = -1) -> bytes:
+        return self._buffer.read(size)
+
+    def stream(self, chunk_size: int):
+        while chunk := self._buffer.read(chunk_size):
+            yield chunk
+
+    def close(self):
+        pass
+
+    def release_conn(self):
+        pass
+
+class FakeMinio:
+    """
+    Dict-backed subset of the Minio client used by ObjectStorage. Calls block
+    for the sampled latency, like the real client does on its worker threads.
+    """
+    def __init__(self, latency: Latency):
+        self.latency = latency
+        self.objects: Dict[str, bytes] = {}
+
+    def bucket_exists(self, bucket: str) -> bool:
+        return True
+
+    def make_bucket(self, bucket: str):
+        pass
+
+    def put_object(self, bucket: str, key: str, data, length: int = -1, **kwargs):
+        time.sleep(self.latency.sample())
+        self.objects[key] = data.read()
+        return SimpleNamespace(etag=str(hash(key)), object_name=key)
+
+    def get_object(self, bucket: str, key: str, offset: int = 0, length: int = 0):
+        time.sleep(self.latency.sample())
+        data = self.objects[key]
+        return _ObjectResponse(data[offset:offset + length] if length else data[offset:])
+
+    def stat_object(self, bucket: str, key: str):
+        data = self.objects[key]
+        return SimpleNamespace(size=len(data), etag=str(hash(key)), content_type="audio/wav")
+
+    def list_objects(self, bucket: str, prefix: str = None, recursive: bool = False):
+        return [SimpleNamespace(object_name=key) for key in list(self.objects) if key.startswith(prefix or "")]
+
+    def remove_objects(self, bucket: str, delete_object_list):
+        time.sleep(self.latency.sample())
+        for obj in delete_object_list:
+            self.objects.pop(obj.name, None)
+        return iter(())
+
+# --- OpenAI (Whisper + Chat Completions) ----------------------------------
+
+TRANSCRIPTS = [
+    "Hi, this is Sarah Jones. I've had chest pain since this morning and my left arm feels numb.",
+    "Hello, it's Mark Lee calling for a repeat prescription of my blood pressure tablets.",
+    "Hi, this is Priya Patel. My daughter has had a fever for two days, could we get an appointment tomorrow?",
+    "This is Tom Brown, I'd like a follow-up telehealth appointment about my back pain next week.",
+    "Hi, it's Alex Kim. My GP gave me a referral to see someone about my anxiety, can I book in?",
+]
+
+class FakeOpenAI:
+    """
+    httpx MockTransport handler that answers /audio/transcriptions and
+    /chat/completions like the OpenAI API, after a sampled delay.
+    `rate_limit_ratio` of chat calls get a 429 with a short Retry-After.
+    """
+    def __init__(self, whisper_latency: Latency, llm_latency: Latency, rate_limit_ratio: float = 0.0, unique: bool = True):
+        self.whisper_latency = whisper_latency
+        self.llm_latency = llm_latency
+        self.rate_limit_ratio = rate_limit_ratio
+        self.unique = unique
+        self.calls = {"whisper": 0, "chat": 0, "rate_limited": 0}
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/audio/transcriptions"):
+            return await self._transcribe()
+        if request.url.path.endswith("/chat/completions"):
+            return await self._chat(json.loads(request.content))
+        return httpx.Response(404, json={"error": {"message": f"Unknown path {request.url.path}"}})
+
+    async def _transcribe(self) -> httpx.Response:
+        await asyncio.sleep(self.whisper_latency.sample())
+        self.calls["whisper"] += 1
+        text = TRANSCRIPTS[self.calls["whisper"] % len(TRANSCRIPTS)]
+        if self.unique:
+            # Distinct text per call so the analysis cache doesn't short-circuit the LLM
+            text += f" Reference {self.calls['whisper']}."
+        return httpx.Response(200, json={"text": text})
+
+    async def _chat(self, body: dict) -> httpx.Response:
+        if self.rate_limit_ratio and random.random() < self.rate_limit_ratio:
+            self.calls["rate_limited"] += 1
+            return httpx.Response(429, headers={"retry-after-ms": "200"}, json={"error": {"message": "Rate limit reached", "type": "requests"}})
+        await asyncio.sleep(self.llm_latency.sample())
+        self.calls["chat"] += 1
+        transcript = body["messages"][-1]["content"]
+        urgency = "RED" if "chest pain" in transcript else "GREEN"
+        analysis = {
+            "intent": "Emergency" if urgency == "RED" else "Appointment Request",
+            "urgency": urgency,
+            "patient_name": "Benchmark Patient",
+            "symptoms": "benchmark",
+            "booking_request": urgency != "RED",
+            "treatment_mode": "In-clinic",
+            "summary": transcript[:80],
+            "missing_info": [],
+        }
+        return httpx.Response(200, json={
+            "id": f"chatcmpl-bench-{self.calls['chat']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "bench"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": json.dumps(analysis)},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 400, "completion_tokens": 120, "total_tokens": 520},
+        })
+
+# --- Orchestrator ---------------------------------------------------------
+
+class FakeStep:
+    """
+    Step runner with Inngest's memoization semantics: a step id that already
+    completed returns its recorded result instead of running again.
+    """
+    def __init__(self):
+        self.results: Dict[str, object] = {}
+
+    async def run(self, step_id: str, fn, *args):
+        if step_id not in self.results:
+            self.results[step_id] = await fn(*args)
+        return self.results[step_id]
+
+class FakeGroup:
+    async def parallel(self, callables):
+        return tuple(await asyncio.gather(*(fn() for fn in callables)))
+
+class FakeOrchestrator:
+    """
+    Replaces `inngest_client.send`: every event immediately starts a run of
+    `function` in this process. Runs that raise RetryAfterError are retried
+    (with their memoized steps) after the requested delay, capped at 1s.
+    """
+    def __init__(self, function, max_attempts: int = 5):
+        self.function = function
+        self.max_attempts = max_attempts
+        self.tasks: List[asyncio.Task] = []
+        self.completed_at: Dict[str, float] = {}
+        self.failed: Dict[str, str] = {}
+
+    async def send(self, events):
+        events = events if isinstance(events, list) else [events]
+        for event in events:
+            self.tasks.append(asyncio.create_task(self._execute(event)))
+        return [f"bench-{len(self.tasks)}"]
+
+    async def _execute(self, event):
+        ctx = SimpleNamespace(event=SimpleNamespace(name=event.name, data=event.data), step=FakeStep(), group=FakeGroup())
+        file_id = event.data["file_id"]
+        for attempt in range(self.max_attempts):
+            try:
+                await self.function._handler(ctx)
+                break
+            except inngest.RetryAfterError as e:
+                delay = (e.retry_after - datetime.datetime.now()).total_seconds()
+                await asyncio.sleep(min(max(delay, 0.0), 1.0))
+            except Exception as e:
+                self.failed[file_id] = str(e)
+                break
+        self.completed_at[file_id] = time.perf_counter()
+
+    async def drain(self):
+        while self.tasks:
+            tasks, self.tasks = self.tasks, []
+            await asyncio.gather(*tasks)
@@ -0,0 +1,123 @@
+"""
+Cold-start import budget for the serverless entry point (api/index.py -> main).
+
+Imports `main` in fresh interpreters with `python -X importtime`, reports the
+median cumulative import time and the slowest packages, and exits non-zero when
+the median exceeds the budget or a module that should load lazily (OpenAI,
+LangChain, MinIO, numpy, ...) is imported at startup. Cheap enough for CI.
+
+    cd backend
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --budget-ms 600 --runs 9 --json imports.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Loaded on first use by the services; importing any of them from `main` is a regression
+DEFERRED_MODULES = ["openai", "langchain_core", "langchain_openai", "minio", "numpy", "soundfile"]
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main", help="module to import")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to measure (median is reported)")
+    parser.add_argument("--budget-ms", type=float, default=800, help="fail when the median cumulative import time exceeds this")
+    parser.add_argument("--deferred", nargs="*", default=DEFERRED_MODULES, help="top-level packages that must not be imported at startup")
+    parser.add_argument("--top", type=int, default=15, help="slowest packages to list")
+    parser.add_argument("--json", dest="json_path", help="also write the results to this file")
+    return parser.parse_args(argv)
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int, int]]:
+    """
+    Parses `-X importtime` output into (module, depth, self_us, cumulative_us).
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return entries
+
+def measure(module: str) -> List[Tuple[str, int, int, int]]:
+    env = dict(os.environ)
+    # Same import path as a cold Vercel instance; nothing here connects anywhere
+    env.setdefault("DATABASE_URL", f"sqlite:///{tempfile.gettempdir()}/import-time.db")
+    env.setdefault("OPENAI_API_KEY", "import-time")
+    env.setdefault("INNGEST_DEV", "1")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+def package_totals(entries: List[Tuple[str, int, int, int]]) -> Dict[str, int]:
+    # Self time summed per top-level package, wherever in the tree it was imported
+    totals: Dict[str, int] = {}
+    for name, _, self_us, _ in entries:
+        package = name.split(".")[0]
+        totals[package] = totals.get(package, 0) + self_us
+    return totals
+
+def main(argv=None):
+    args = parse_args(argv)
+    runs = [measure(args.module) for _ in range(args.runs)]
+
+    totals_ms = []
+    for entries in runs:
+        root = next((cumulative for name, _, _, cumulative in entries if name == args.module), None)
+        if root is None:
+            raise SystemExit(f"{args.module} was not in the importtime output")
+        totals_ms.append(root / 1000)
+    median_ms = statistics.median(totals_ms)
+
+    # Package breakdown from the run closest to the median
+    entries = runs[min(range(len(runs)), key=lambda i: abs(totals_ms[i] - median_ms))]
+    packages = sorted(package_totals(entries).items(), key=lambda item: item[1], reverse=True)
+    imported = {name.split(".")[0] for name, _, _, _ in entries}
+    eager = [module for module in args.deferred if module in imported]
+
+    print(f"import {args.module}: median {median_ms:.0f} ms over {args.runs} runs "
+          f"(min {min(totals_ms):.0f}, max {max(totals_ms):.0f}), budget {args.budget_ms:.0f} ms")
+    print("\nslowest packages (self time, ms):")
+    for package, self_us in packages[:args.top]:
+        print(f"  {package:<32} {self_us / 1000:>8.1f}")
+
+    failures = []
+    if median_ms > args.budget_ms:
+        failures.append(f"median import time {median_ms:.0f} ms exceeds the {args.budget_ms:.0f} ms budget")
+    if eager:
+        failures.append(f"imported at startup but expected to load lazily: {', '.join(eager)}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({
+                "module": args.module,
+                "runs_ms": [round(ms, 1) for ms in totals_ms],
+                "median_ms": round(median_ms, 1),
+                "budget_ms": args.budget_ms,
+                "packages_ms": {package: round(self_us / 1000, 1) for package, self_us in packages},
+                "eager_deferred_modules": eager,
+                "failures": failures,
+            }, f, indent=2)
+
+    if failures:
+        print("\nFAIL: " + "; ".join(failures))
+        sys.exit(1)
+    print("\nOK")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+Offline throughput benchmark for ingestion (POST /api/voicemails) and the
+process_voicemail workflow, end to end, with no network services.
+
+Storage, Whisper/Chat and the Inngest runner are replaced by the in-process
+fakes in benchmarks/fakes.py with configurable latency; the database is a
+throwaway SQLite file unless --database-url points at Postgres.
+`--backend embedded` runs the workflow on the real embedded worker instead of
+the fake step runner (durable steps included).
+
+    cd backend
+    python -m benchmarks.pipeline --concurrency 1 8 32 --requests 200
+    python -m benchmarks.pipeline --whisper-ms 1500 --llm-ms 2500 --json results.json
+    python -m benchmarks.pipeline --backend embedded
+
+Reports p50/p95/p99 latency for the upload request and for upload-to-triaged,
+throughput per concurrency level, and the mean time per pipeline stage.
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+from typing import Dict, List
+
+from benchmarks.fakes import FakeMinio, FakeOpenAI, FakeOrchestrator, Latency
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "..", "..", "test_data", "*.wav")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16], help="concurrent uploaders per level")
+    parser.add_argument("--requests", type=int, default=50, help="voicemails per level")
+    parser.add_argument("--storage-ms", type=float, default=15, help="median object storage latency")
+    parser.add_argument("--whisper-ms", type=float, default=800, help="median Whisper latency")
+    parser.add_argument("--llm-ms", type=float, default=1200, help="median chat completion latency")
+    parser.add_argument("--sigma", type=float, default=0.3, help="log-normal spread of all latencies (0 = constant)")
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0, help="fraction of chat calls answered with 429")
+    parser.add_argument("--reuse-audio", action="store_true", help="upload identical audio so transcript/analysis caches hit")
+    parser.add_argument("--backend", choices=["fake", "embedded"], default="fake", help="workflow runner: fake step runner or the embedded worker")
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--json", dest="json_path", help="also write the results to this file")
+    return parser.parse_args(argv)
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    return {f"p{int(q * 100)}_ms": round(percentile(values, q) * 1000, 1) for q in (0.5, 0.95, 0.99)}
+
+def unique_variant(wav: bytes, n: int) -> bytes:
+    """
+    Same audio with one least-significant sample byte flipped: inaudible, but a
+    different SHA-256, so every upload misses the transcript cache.
+    """
+    data = bytearray(wav)
+    offset = data.find(b"data", 12) + 8
+    index = offset + (n * 4) % max(1, len(data) - offset - 4)
+    data[index] ^= 1
+    return bytes(data)
+
+def stage_totals() -> Dict[tuple, list]:
+    from app.core.metrics import STAGE_SECONDS
+
+    totals: Dict[tuple, list] = {}
+    for metric in STAGE_SECONDS.collect():
+        for sample in metric.samples:
+            if sample.name.endswith(("_sum", "_count")):
+                key = (sample.labels["pipeline"], sample.labels["stage"])
+                entry = totals.setdefault(key, [0.0, 0.0])
+                entry[0 if sample.name.endswith("_sum") else 1] += sample.value
+    return totals
+
+class EmbeddedRunner:
+    """
+    Adapts the embedded worker to the FakeOrchestrator interface used by run_level.
+    """
+    def __init__(self, worker, function):
+        self.worker = worker
+        self.completed_at: Dict[str, float] = {}
+        self.failed: Dict[str, str] = {}
+
+        async def handler(ctx):
+            file_id = ctx.event.data["file_id"]
+            try:
+                return await function._handler(ctx)
+            except Exception as e:
+                self.failed[file_id] = str(e)
+                raise
+            finally:
+                self.completed_at[file_id] = time.perf_counter()
+
+        worker.register("voicemail/received", SimpleNamespace(_handler=handler))
+
+    async def drain(self):
+        await self.worker.join()
+
+async def run_level(client, orchestrator, payloads: List[bytes], concurrency: int) -> dict:
+    queue: asyncio.Queue = asyncio.Queue()
+    for payload in payloads:
+        queue.put_nowait(payload)
+    started: Dict[str, float] = {}
+    upload_latencies: List[float] = []
+    errors = 0
+
+    async def uploader():
+        nonlocal errors
+        while not queue.empty():
+            payload = queue.get_nowait()
+            start = time.perf_counter()
+            response = await client.post("/api/voicemails", files={"file": ("voicemail.wav", payload, "audio/wav")})
+            upload_latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors += 1
+                continue
+            started[response.json()["id"]] = start
+
+    before = stage_totals()
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(uploader() for _ in range(concurrency)))
+    ingest_seconds = time.perf_counter() - wall_start
+    await orchestrator.drain()
+    wall_seconds = time.perf_counter() - wall_start
+
+    end_to_end = [orchestrator.completed_at[vm_id] - start for vm_id, start in started.items() if vm_id in orchestrator.completed_at]
+    after = stage_totals()
+    stages = {
+        f"{pipeline}.{stage}": round((total - before.get((pipeline, stage), [0, 0])[0]) / count_delta * 1000, 1)
+        for (pipeline, stage), (total, count) in after.items()
+        if (count_delta := count - before.get((pipeline, stage), [0, 0])[1]) > 0
+    }
+    return {
+        "concurrency": concurrency,
+        "requests": len(payloads),
+        "upload_errors": errors,
+        "pipeline_failures": sum(1 for vm_id in started if vm_id in orchestrator.failed),
+        "ingest_per_s": round(len(payloads) / ingest_seconds, 1),
+        "processed_per_s": round(len(end_to_end) / wall_seconds, 1),
+        "upload": summarize(upload_latencies),
+        "end_to_end": summarize(end_to_end),
+        "stage_mean_ms": stages,
+    }
+
+async def run(args) -> List[dict]:
+    # Imported here: settings are read from the environment prepared in main()
+    import httpx
+    from openai import AsyncOpenAI
+    from langchain_openai import ChatOpenAI
+
+    import main as app_main
+    from app import inngest_client as pipeline
+    from app.core.config import settings
+    from app.services import transcription
+    from app.services.intelligence import IntelligenceService, LLM_MODEL
+    from app.services.object_storage import object_storage
+    from app.services.dispatch import dispatcher
+    from app.services.worker import embedded_worker
+
+    openai_fake = FakeOpenAI(
+        Latency(args.whisper_ms, args.sigma),
+        Latency(args.llm_ms, args.sigma),
+        rate_limit_ratio=args.rate_limit_ratio,
+        unique=not args.reuse_audio,
+    )
+    object_storage._client = FakeMinio(Latency(args.storage_ms, args.sigma))
+    transcription.client = AsyncOpenAI(api_key="bench", http_client=httpx.AsyncClient(transport=openai_fake.transport()))
+    pipeline.intelligence_service = IntelligenceService(llm=ChatOpenAI(
+        model=LLM_MODEL,
+        temperature=0,
+        api_key="bench",
+        max_retries=settings.LLM_SDK_MAX_RETRIES,
+        http_async_client=httpx.AsyncClient(transport=openai_fake.transport()),
+    ))
+    if args.backend == "embedded":
+        orchestrator = EmbeddedRunner(embedded_worker, pipeline.process_voicemail)
+        await embedded_worker.start()
+    else:
+        orchestrator = FakeOrchestrator(pipeline.process_voicemail)
+        dispatcher.send = orchestrator.send
+
+    fixtures = [open(path, "rb").read() for path in sorted(glob.glob(FIXTURES))]
+    if not fixtures:
+        raise SystemExit(f"No fixtures found at {FIXTURES}")
+
+    results = []
+    transport = httpx.ASGITransport(app=app_main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+        counter = 0
+        for concurrency in args.concurrency:
+            payloads = []
+            for i in range(args.requests):
+                fixture = fixtures[i % len(fixtures)]
+                payloads.append(fixture if args.reuse_audio else unique_variant(fixture, counter))
+                counter += 1
+            results.append(await run_level(client, orchestrator, payloads, concurrency))
+    if args.backend == "embedded":
+        await embedded_worker.stop()
+    results.append({"openai_calls": openai_fake.calls})
+    return results
+
+def report(results: List[dict]):
+    header = f"{'conc':>5} {'reqs':>5} {'ingest/s':>9} {'done/s':>7}  {'upload p50/p95/p99 ms':>24}  {'end-to-end p50/p95/p99 ms':>28}  errors"
+    print(header)
+    print("-" * len(header))
+    for row in results:
+        if "concurrency" not in row:
+            continue
+        upload = "/".join(str(v) for v in row["upload"].values())
+        e2e = "/".join(str(v) for v in row["end_to_end"].values())
+        print(f"{row['concurrency']:>5} {row['requests']:>5} {row['ingest_per_s']:>9} {row['processed_per_s']:>7}  {upload:>24}  {e2e:>28}  {row['upload_errors'] + row['pipeline_failures']}")
+    for row in results:
+        if "concurrency" in row:
+            print(f"\nmean stage time at concurrency {row['concurrency']} (ms):")
+            for stage, ms in sorted(row["stage_mean_ms"].items()):
+                print(f"  {stage:<32} {ms:>9}")
+    print(f"\n{results[-1]}")
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Must be in place before the app's settings module is imported
+    database_url = args.database_url or f"sqlite:///{tempfile.mkdtemp(prefix='voicemail-bench-')}/bench.db"
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    os.environ.setdefault("INNGEST_DEV", "1")
+    os.environ["TRIAGE_MODE"] = "single"
+    os.environ["EXECUTION_BACKEND"] = "embedded" if args.backend == "embedded" else "inngest"
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+    from app.db.migrate import upgrade_database
+    upgrade_database()
+
+    results = asyncio.run(run(args))
+    report(results)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
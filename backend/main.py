@@ -1,19 +1,24 @@
 import logging
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.api.routes import router as api_router
-from app.inngest_client import inngest_client, process_voicemail
+from app.api.responses import FastJSONResponse, SelectiveGZipMiddleware
+from app.inngest_client import inngest_client, inngest_functions
 import inngest.fast_api
-from app.db.session import engine, Base
+from app.db.session import async_engine
+from app.services.object_storage import object_storage
+from app.services.dispatch import dispatcher
+from app.services.worker import embedded_worker
+from app.services.events import voicemail_events
+from app.core.metrics import render_metrics
 
 # Logging
 logging.basicConfig(level=logging.INFO)
 
-# Create Tables
-Base.metadata.create_all(bind=engine)
+# Schema is managed by Alembic migrations (`python -m app.db.migrate`, run before the server starts)
 
-app = FastAPI(title=settings.PROJECT_NAME)
+app = FastAPI(title=settings.PROJECT_NAME, default_response_class=FastJSONResponse)
 
 # CORS
 # CORS
@@ -31,16 +36,48 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON responses (the list polls dominate egress)
+app.add_middleware(
+    SelectiveGZipMiddleware,
+    minimum_size=1000,
+    exclude_paths=("/api/voicemails/audio/", "/api/voicemails/stream"),
+)
+
+@app.on_event("startup")
+async def startup():
+    # Check the bucket once per process rather than on every upload
+    try:
+        await object_storage.ensure_bucket()
+    except Exception as e:
+        logging.getLogger(__name__).error(f"Bucket check failed: {str(e)}")
+    if dispatcher.embedded:
+        # Also resumes runs left unfinished by a previous process
+        await embedded_worker.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    if dispatcher.embedded:
+        await embedded_worker.stop()
+    await voicemail_events.stop()
+    await async_engine.dispose()
+
 @app.get("/")
 def read_root():
     from fastapi.responses import RedirectResponse
     return RedirectResponse(url="/docs")
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    # Prometheus scrape endpoint
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 # Mount Routes
 app.include_router(api_router, prefix="/api")
 
-# Serve Inngest
-inngest.fast_api.serve(app, inngest_client, [process_voicemail])
+# Serve Inngest (the embedded backend runs the same functions in-process instead)
+if not dispatcher.embedded:
+    inngest.fast_api.serve(app, inngest_client, inngest_functions)
 
 if __name__ == "__main__":
     import uvicorn
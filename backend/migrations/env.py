@@ -0,0 +1,63 @@
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import engine_from_config, pool
+from sqlalchemy.engine import make_url
+
+from app.db.session import Base, DATABASE_URL
+# Importing storage registers every model on Base.metadata
+import app.db.storage  # noqa: F401
+
+config = context.config
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+config.set_main_option("sqlalchemy.url", DATABASE_URL.replace("%", "%%"))
+target_metadata = Base.metadata
+
+def _is_sqlite() -> bool:
+    return config.get_main_option("sqlalchemy.url").startswith("sqlite")
+
+def _dialect_name() -> str:
+    return make_url(config.get_main_option("sqlalchemy.url")).get_backend_name()
+
+def include_object(object, name, type_, reflected, compare_to):
+    # Objects declared for specific dialects (info={"dialects": ...}) only, e.g. GIN indexes
+    info = getattr(object, "info", {})
+    dialects = info.get("dialects")
+    if dialects and _dialect_name() not in dialects:
+        return False
+    # Index present on both sides but "changed": skip indexes whose expressions
+    # the database reflects in a form that never matches textually
+    if type_ == "index" and compare_to is not None and info.get("compare_expressions") is False:
+        return False
+    return True
+
+def run_migrations_offline() -> None:
+    context.configure(
+        url=config.get_main_option("sqlalchemy.url"),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=_is_sqlite(),
+        include_object=include_object,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online() -> None:
+    connectable = engine_from_config(
+        config.get_section(config.config_ini_section, {}),
+        prefix="sqlalchemy.",
+        poolclass=pool.NullPool,
+    )
+    with connectable.connect() as connection:
+        # SQLite can't ALTER most things in place; batch mode rebuilds the table
+        context.configure(connection=connection, target_metadata=target_metadata, render_as_batch=_is_sqlite(), include_object=include_object)
+        with context.begin_transaction():
+            context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
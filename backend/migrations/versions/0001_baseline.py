@@ -0,0 +1,33 @@
+"""Baseline: the original voicemails table
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "voicemails",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("status", sa.String(), nullable=True),
+        sa.Column("file_path", sa.String(), nullable=True),
+        sa.Column("created_at", sa.String(), nullable=True),
+        sa.Column("transcript", sa.String(), nullable=True),
+        sa.Column("urgency", sa.String(), nullable=True),
+        sa.Column("category", sa.String(), nullable=True),
+        sa.Column("analysis", sa.JSON(), nullable=True),
+    )
+    op.create_index("ix_voicemails_id", "voicemails", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_voicemails_id", table_name="voicemails")
+    op.drop_table("voicemails")
@@ -0,0 +1,118 @@
+"""Triage-order indexes, change feed, transcript cache and embedded worker tables
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+
+Databases created by the old `create_all` at startup may already have some of
+these objects (whichever models existed when the table was first created), so
+each one is only added when missing.
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# Triage order expression at this revision (0009 replaces it with urgency_priority)
+# Parenthesized: Postgres only accepts a bare expression in an index inside ( )
+URGENCY_RANK = "(CASE WHEN (urgency = 'RED') THEN 0 WHEN (urgency = 'YELLOW') THEN 1 WHEN (urgency = 'GREEN') THEN 2 ELSE 3 END)"
+
+
+def upgrade() -> None:
+    if context.is_offline_mode():
+        # Generated SQL (--sql) targets a database at 0001 exactly
+        tables, columns, indexes = set(), set(), set()
+    else:
+        inspector = sa.inspect(op.get_bind())
+        tables = set(inspector.get_table_names())
+        columns = {column["name"] for column in inspector.get_columns("voicemails")}
+        indexes = {index["name"] for index in inspector.get_indexes("voicemails")}
+
+    new_columns = [
+        sa.Column("audio_sha256", sa.String(), nullable=True),
+        sa.Column("audio_metrics", sa.JSON(), nullable=True),
+        sa.Column("updated_at", sa.String(), nullable=True),
+    ]
+    missing_columns = [column for column in new_columns if column.name not in columns]
+    if missing_columns:
+        with op.batch_alter_table("voicemails") as batch:
+            for column in missing_columns:
+                batch.add_column(column)
+    op.execute("UPDATE voicemails SET updated_at = created_at WHERE updated_at IS NULL")
+
+    new_indexes = {
+        "ix_voicemails_audio_sha256": ["audio_sha256"],
+        "ix_voicemails_triage_order": [sa.text(URGENCY_RANK), sa.text("created_at DESC"), sa.text("id DESC")],
+        "ix_voicemails_status_triage_order": ["status", sa.text(URGENCY_RANK), sa.text("created_at DESC"), sa.text("id DESC")],
+        "ix_voicemails_urgency_created_at": ["urgency", sa.text("created_at DESC"), sa.text("id DESC")],
+        "ix_voicemails_updated_at_id": ["updated_at", "id"],
+    }
+    for name, index_columns in new_indexes.items():
+        if name not in indexes:
+            op.create_index(name, "voicemails", index_columns)
+
+    if "transcript_cache" not in tables:
+        _create_transcript_cache()
+    if "workflow_runs" not in tables:
+        _create_workflow_runs()
+    if "workflow_steps" not in tables:
+        _create_workflow_steps()
+
+
+def _create_transcript_cache() -> None:
+    op.create_table(
+        "transcript_cache",
+        sa.Column("audio_sha256", sa.String(), primary_key=True),
+        sa.Column("model", sa.String(), primary_key=True),
+        sa.Column("transcript", sa.String(), nullable=True),
+        sa.Column("created_at", sa.String(), nullable=True),
+    )
+
+
+def _create_workflow_runs() -> None:
+    op.create_table(
+        "workflow_runs",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("function", sa.String(), nullable=True),
+        sa.Column("event", sa.JSON(), nullable=True),
+        sa.Column("status", sa.String(), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=True),
+        sa.Column("error", sa.String(), nullable=True),
+        sa.Column("created_at", sa.String(), nullable=True),
+        sa.Column("updated_at", sa.String(), nullable=True),
+    )
+    op.create_index("ix_workflow_runs_id", "workflow_runs", ["id"])
+    op.create_index("ix_workflow_runs_status", "workflow_runs", ["status"])
+
+
+def _create_workflow_steps() -> None:
+    op.create_table(
+        "workflow_steps",
+        sa.Column("run_id", sa.String(), primary_key=True),
+        sa.Column("step_id", sa.String(), primary_key=True),
+        sa.Column("output", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.String(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("workflow_steps")
+    op.drop_index("ix_workflow_runs_status", table_name="workflow_runs")
+    op.drop_index("ix_workflow_runs_id", table_name="workflow_runs")
+    op.drop_table("workflow_runs")
+    op.drop_table("transcript_cache")
+    for name in (
+        "ix_voicemails_updated_at_id",
+        "ix_voicemails_urgency_created_at",
+        "ix_voicemails_status_triage_order",
+        "ix_voicemails_triage_order",
+        "ix_voicemails_audio_sha256",
+    ):
+        op.drop_index(name, table_name="voicemails")
+    with op.batch_alter_table("voicemails") as batch:
+        batch.drop_column("updated_at")
+        batch.drop_column("audio_metrics")
+        batch.drop_column("audio_sha256")
@@ -0,0 +1,107 @@
+"""Typed voicemail schema: timestamptz, enum urgency/status, JSONB + analysis indexes
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+
+Postgres converts the columns in place. SQLite only has type affinities and the
+old string timestamps are already in SQLAlchemy's SQLite format, so there the
+table is rebuilt with the new declared types and the rows copied unchanged;
+batch mode can't reflect expression indexes, so those are dropped and
+recreated around the rebuild.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+URGENCY_LEVELS = ("RED", "YELLOW", "GREEN", "NEED_VALIDATION")
+STATUSES = ("PROCESSING", "COMPLETED", "FAILED", "NEED_VALIDATION")
+
+# Triage order expression at this revision (0009 replaces it with urgency_priority)
+# Parenthesized: Postgres only accepts a bare expression in an index inside ( )
+URGENCY_RANK = "(CASE WHEN (urgency = 'RED') THEN 0 WHEN (urgency = 'YELLOW') THEN 1 WHEN (urgency = 'GREEN') THEN 2 ELSE 3 END)"
+
+
+def _quoted(values) -> str:
+    return ", ".join(f"'{value}'" for value in values)
+
+
+def _drop_triage_indexes() -> None:
+    op.drop_index("ix_voicemails_status_triage_order", table_name="voicemails")
+    op.drop_index("ix_voicemails_triage_order", table_name="voicemails")
+
+
+def _create_triage_indexes() -> None:
+    op.create_index("ix_voicemails_triage_order", "voicemails", [sa.text(URGENCY_RANK), sa.text("created_at DESC"), sa.text("id DESC")])
+    op.create_index("ix_voicemails_status_triage_order", "voicemails", ["status", sa.text(URGENCY_RANK), sa.text("created_at DESC"), sa.text("id DESC")])
+
+
+def _rebuild_sqlite(timestamp_type, text_type) -> None:
+    _drop_triage_indexes()
+    # The new types go in through reflect_args, not alter_column: a batch type
+    # change copies rows with CAST(... AS DATETIME), which has NUMERIC affinity
+    # in SQLite and turns '2024-01-01 10:00:00' into 2024
+    with op.batch_alter_table("voicemails", recreate="always", reflect_args=[
+        sa.Column("created_at", timestamp_type),
+        sa.Column("updated_at", timestamp_type),
+        sa.Column("urgency", text_type("urgency")),
+        sa.Column("status", text_type("status")),
+    ]):
+        pass
+    _create_triage_indexes()
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        _rebuild_sqlite(
+            sa.DateTime(timezone=True),
+            lambda column: sa.Enum(*(URGENCY_LEVELS if column == "urgency" else STATUSES), name=f"voicemail_{column}"),
+        )
+    elif dialect == "postgresql":
+        # Values outside the enums would make the type change fail
+        op.execute(f"UPDATE voicemails SET urgency = 'NEED_VALIDATION' WHERE urgency IS NOT NULL AND urgency NOT IN ({_quoted(URGENCY_LEVELS)})")
+        op.execute(f"UPDATE voicemails SET status = 'FAILED' WHERE status IS NOT NULL AND status NOT IN ({_quoted(STATUSES)})")
+        op.execute(f"CREATE TYPE voicemail_urgency AS ENUM ({_quoted(URGENCY_LEVELS)})")
+        op.execute(f"CREATE TYPE voicemail_status AS ENUM ({_quoted(STATUSES)})")
+        # ALTER TYPE would keep the triage indexes' varchar comparisons
+        # (urgency::text = 'RED'), which the enum-typed urgency_rank in the
+        # list query no longer matches; rebuild them on the new type instead
+        _drop_triage_indexes()
+        op.execute("ALTER TABLE voicemails ALTER COLUMN urgency TYPE voicemail_urgency USING urgency::voicemail_urgency")
+        op.execute("ALTER TABLE voicemails ALTER COLUMN status TYPE voicemail_status USING status::voicemail_status")
+        # Legacy values are str(datetime.now()) from UTC containers
+        for column in ("created_at", "updated_at"):
+            op.execute(
+                f"ALTER TABLE voicemails ALTER COLUMN {column} TYPE TIMESTAMP WITH TIME ZONE "
+                f"USING (NULLIF({column}, '')::timestamp AT TIME ZONE 'UTC')"
+            )
+        for column in ("analysis", "audio_metrics"):
+            op.execute(f"ALTER TABLE voicemails ALTER COLUMN {column} TYPE JSONB USING {column}::jsonb")
+        _create_triage_indexes()
+
+    op.create_index("ix_voicemails_analysis_intent", "voicemails", [sa.text("(analysis ->> 'intent')")])
+    op.create_index("ix_voicemails_analysis_treatment_mode", "voicemails", [sa.text("(analysis ->> 'treatment_mode')")])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_voicemails_analysis_treatment_mode", table_name="voicemails")
+    op.drop_index("ix_voicemails_analysis_intent", table_name="voicemails")
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        _rebuild_sqlite(sa.String(), lambda column: sa.String())
+    elif dialect == "postgresql":
+        _drop_triage_indexes()
+        for column in ("analysis", "audio_metrics"):
+            op.execute(f"ALTER TABLE voicemails ALTER COLUMN {column} TYPE JSON USING {column}::json")
+        for column in ("created_at", "updated_at"):
+            op.execute(f"ALTER TABLE voicemails ALTER COLUMN {column} TYPE VARCHAR USING ({column} AT TIME ZONE 'UTC')::text")
+        op.execute("ALTER TABLE voicemails ALTER COLUMN status TYPE VARCHAR USING status::text")
+        op.execute("ALTER TABLE voicemails ALTER COLUMN urgency TYPE VARCHAR USING urgency::text")
+        op.execute("DROP TYPE voicemail_status")
+        op.execute("DROP TYPE voicemail_urgency")
+        _create_triage_indexes()
@@ -0,0 +1,45 @@
+"""Full-text search column over transcript and analysis
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+
+Postgres: a stored, generated tsvector with a GIN index. Adding a stored
+generated column rewrites the table, so on a large deployment run this in a
+maintenance window. SQLite: a virtual generated text column (computed on read)
+that the search endpoint scans with LIKE; no index.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+# Must match app.models.voicemail.SearchDocument
+SOURCES = (
+    ("transcript", "C"),
+    ("analysis ->> 'patient_name'", "A"),
+    ("analysis ->> 'summary'", "B"),
+    ("analysis ->> 'symptoms'", "B"),
+)
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        document = " || ".join(
+            f"setweight(to_tsvector('english', coalesce({source}, '')), '{weight}')" for source, weight in SOURCES
+        )
+        op.execute(f"ALTER TABLE voicemails ADD COLUMN search_vector TSVECTOR GENERATED ALWAYS AS ({document}) STORED")
+        op.create_index("ix_voicemails_search_vector", "voicemails", ["search_vector"], postgresql_using="gin")
+    else:
+        document = " || ' ' || ".join(f"coalesce({source}, '')" for source, _ in SOURCES)
+        op.execute(f"ALTER TABLE voicemails ADD COLUMN search_vector TEXT GENERATED ALWAYS AS ({document}) VIRTUAL")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_index("ix_voicemails_search_vector", table_name="voicemails")
+    op.execute("ALTER TABLE voicemails DROP COLUMN search_vector")
@@ -0,0 +1,21 @@
+"""Index for the chronological list orders
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_voicemails_created_at_id", "voicemails", [sa.text("created_at DESC"), sa.text("id DESC")])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_voicemails_created_at_id", table_name="voicemails")
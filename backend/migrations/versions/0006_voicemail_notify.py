@@ -0,0 +1,50 @@
+"""NOTIFY voicemail changes for the SSE stream
+
+Postgres only: every insert/update of a voicemail is announced on the
+voicemail_events channel when its transaction commits, so every API process
+LISTENing there can push it to its streams. Other dialects fan out in-process.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if op.get_context().dialect.name != "postgresql":
+        return
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION notify_voicemail_change() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('voicemail_events', json_build_object(
+                'id', NEW.id,
+                'status', NEW.status,
+                'urgency', NEW.urgency,
+                'updated_at', NEW.updated_at
+            )::text);
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER voicemails_notify
+        AFTER INSERT OR UPDATE ON voicemails
+        FOR EACH ROW EXECUTE FUNCTION notify_voicemail_change()
+        """
+    )
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name != "postgresql":
+        return
+    op.execute("DROP TRIGGER IF EXISTS voicemails_notify ON voicemails")
+    op.execute("DROP FUNCTION IF EXISTS notify_voicemail_change()")
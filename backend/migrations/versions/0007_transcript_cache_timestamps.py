@@ -0,0 +1,37 @@
+"""Timezone-aware transcript_cache.created_at
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+
+Same conversion as 0003 for voicemails: in place on Postgres; on SQLite the
+table is rebuilt with the new declared type and the string values (already in
+SQLAlchemy's SQLite format) copied unchanged.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def _retype(timestamp_type, postgres_type: str, postgres_using: str) -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        # reflect_args, not alter_column: a batch type change copies rows with a
+        # NUMERIC-affinity CAST that truncates the timestamps (see 0003)
+        with op.batch_alter_table("transcript_cache", recreate="always", reflect_args=[sa.Column("created_at", timestamp_type)]):
+            pass
+    elif dialect == "postgresql":
+        op.execute(f"ALTER TABLE transcript_cache ALTER COLUMN created_at TYPE {postgres_type} USING {postgres_using}")
+
+
+def upgrade() -> None:
+    # Legacy values are str(datetime.now()) from UTC containers
+    _retype(sa.DateTime(timezone=True), "TIMESTAMP WITH TIME ZONE", "(NULLIF(created_at, '')::timestamp AT TIME ZONE 'UTC')")
+
+
+def downgrade() -> None:
+    _retype(sa.String(), "VARCHAR", "(created_at AT TIME ZONE 'UTC')::text")
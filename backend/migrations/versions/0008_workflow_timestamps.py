@@ -0,0 +1,43 @@
+"""Timezone-aware workflow_runs / workflow_steps timestamps
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17
+
+Same conversion as 0003/0007: in place on Postgres; on SQLite each table is
+rebuilt with the new declared types and the string values copied unchanged.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+TIMESTAMP_COLUMNS = {
+    "workflow_runs": ("created_at", "updated_at"),
+    "workflow_steps": ("created_at",),
+}
+
+
+def _retype(timestamp_type, postgres_type: str, postgres_using: str) -> None:
+    dialect = op.get_bind().dialect.name
+    for table, columns in TIMESTAMP_COLUMNS.items():
+        if dialect == "sqlite":
+            # reflect_args, not alter_column: a batch type change copies rows with a
+            # NUMERIC-affinity CAST that truncates the timestamps (see 0003)
+            with op.batch_alter_table(table, recreate="always", reflect_args=[sa.Column(column, timestamp_type) for column in columns]):
+                pass
+        elif dialect == "postgresql":
+            for column in columns:
+                op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE {postgres_type} USING {postgres_using.format(column=column)}")
+
+
+def upgrade() -> None:
+    # Legacy values are str(datetime.now()) from UTC containers
+    _retype(sa.DateTime(timezone=True), "TIMESTAMP WITH TIME ZONE", "(NULLIF({column}, '')::timestamp AT TIME ZONE 'UTC')")
+
+
+def downgrade() -> None:
+    _retype(sa.String(), "VARCHAR", "({column} AT TIME ZONE 'UTC')::text")
@@ -0,0 +1,38 @@
+"""Triage indexes on a descending urgency priority
+
+The triage order now puts NEED_VALIDATION right after RED and sorts every key
+descending (priority, created_at, id), so the list seek is a single row
+comparison that starts an index range. Both triage indexes are rebuilt on the
+new expression.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+# Must match app.models.voicemail.urgency_priority
+URGENCY_PRIORITY = "(CASE WHEN (urgency = 'RED') THEN 4 WHEN (urgency = 'NEED_VALIDATION') THEN 3 WHEN (urgency = 'YELLOW') THEN 2 WHEN (urgency = 'GREEN') THEN 1 ELSE 0 END)"
+# The 0002/0003 expression (lower rank first)
+URGENCY_RANK = "(CASE WHEN (urgency = 'RED') THEN 0 WHEN (urgency = 'YELLOW') THEN 1 WHEN (urgency = 'GREEN') THEN 2 ELSE 3 END)"
+
+
+def _rebuild_triage_indexes(expression: str) -> None:
+    op.drop_index("ix_voicemails_status_triage_order", table_name="voicemails")
+    op.drop_index("ix_voicemails_triage_order", table_name="voicemails")
+    op.create_index("ix_voicemails_triage_order", "voicemails", [sa.text(expression), sa.text("created_at DESC"), sa.text("id DESC")])
+    op.create_index("ix_voicemails_status_triage_order", "voicemails", ["status", sa.text(expression), sa.text("created_at DESC"), sa.text("id DESC")])
+
+
+def upgrade() -> None:
+    _rebuild_triage_indexes(f"{URGENCY_PRIORITY} DESC")
+
+
+def downgrade() -> None:
+    _rebuild_triage_indexes(URGENCY_RANK)
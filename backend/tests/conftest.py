@@ -0,0 +1,18 @@
+import os
+import tempfile
+
+import pytest
+
+# Settings and engines are read at import time: point them at a scratch SQLite
+# database before any test module imports the app
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='voicemail-tests-')}/test.db"
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("INNGEST_DEV", "1")
+
+
+@pytest.fixture(scope="session")
+def database():
+    from app.db.migrate import upgrade_database
+    from app.db.session import engine
+    upgrade_database()
+    return engine
@@ -0,0 +1,65 @@
+import asyncio
+from types import SimpleNamespace
+
+from sqlalchemy import delete, insert, select
+
+from app import inngest_client
+from app.models.voicemail import Voicemail
+from app.services.intelligence import intelligence_service
+
+ANALYSIS = {"intent": "Prescription refill", "urgency": "GREEN", "summary": "Refill", "missing_info": []}
+
+
+class Step:
+    """
+    Runs every step once and records its output, as Inngest memoizes it.
+    """
+    def __init__(self):
+        self.outputs = {}
+
+    async def run(self, step_id, fn, *args):
+        self.outputs[step_id] = await fn(*args)
+        return self.outputs[step_id]
+
+
+class Group:
+    async def parallel(self, callables):
+        return tuple(await asyncio.gather(*(fn() for fn in callables)))
+
+
+async def _prepare_transcript(file_id, file_path, audio_sha256=None):
+    if file_id == "vm-broken":
+        raise RuntimeError("Whisper rejected the audio")
+    return f"Hi, this is {file_id}, I need a refill"
+
+
+async def _analyze_batch(transcripts, skip_cache_ids=()):
+    return {file_id: dict(ANALYSIS) for file_id in transcripts}
+
+
+def test_one_failed_transcription_fails_only_its_voicemail(database, monkeypatch):
+    ids = ["vm-first", "vm-broken", "vm-last"]
+    with database.begin() as conn:
+        conn.execute(delete(Voicemail))
+        conn.execute(insert(Voicemail), [{"id": vm_id, "status": "PROCESSING", "file_path": f"{vm_id}.wav"} for vm_id in ids])
+    monkeypatch.setattr(inngest_client, "prepare_transcript", _prepare_transcript)
+    monkeypatch.setattr(intelligence_service, "aanalyze_batch", _analyze_batch)
+
+    step = Step()
+    ctx = SimpleNamespace(
+        events=[SimpleNamespace(data={"file_id": vm_id, "file_path": f"{vm_id}.wav", "audio_sha256": "x"}) for vm_id in ids],
+        step=step,
+        group=Group(),
+    )
+    result = asyncio.run(inngest_client.process_voicemail_batch._handler(ctx))
+
+    assert result == {"status": "success", "count": 3, "failed": 1}
+    assert "mark_batch_failed" not in step.outputs
+    with database.connect() as conn:
+        rows = {row.id: row for row in conn.execute(select(Voicemail.id, Voicemail.status, Voicemail.urgency, Voicemail.analysis))}
+    assert rows["vm-broken"].status == "FAILED"
+    assert rows["vm-broken"].analysis == {"error": "Whisper rejected the audio"}
+    for vm_id in ("vm-first", "vm-last"):
+        assert rows[vm_id].status == "COMPLETED"
+        assert rows[vm_id].urgency == "GREEN"
+        assert rows[vm_id].analysis["intent"] == "Prescription refill"
@@ -0,0 +1,100 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import delete, insert, update
+
+from app.db.storage import CHANGE_FEED_MAX_SEEN, async_db, decode_change_cursor, _changes_page, _changes_query
+from app.models.voicemail import Voicemail
+
+START = datetime(2026, 3, 1, 9, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def voicemails(database):
+    with database.begin() as conn:
+        conn.execute(delete(Voicemail))
+        conn.execute(insert(Voicemail), [
+            {"id": f"vm-{i}", "status": "PROCESSING", "created_at": START, "updated_at": START + timedelta(seconds=i)}
+            for i in range(5)
+        ])
+    return database
+
+
+def _write(database, vm_id, updated_at):
+    # What a transaction stamped at `updated_at` looks like once it commits
+    with database.begin() as conn:
+        if conn.execute(update(Voicemail).where(Voicemail.id == vm_id).values(updated_at=updated_at)).rowcount == 0:
+            conn.execute(insert(Voicemail).values(id=vm_id, status="PROCESSING", created_at=START, updated_at=updated_at))
+
+
+def _changes(database, since=None, limit=2):
+    with database.connect() as conn:
+        return _changes_page(list(conn.execute(_changes_query(since, limit))), since, limit)
+
+
+def _drain(database, since=None, limit=2):
+    ids = []
+    while True:
+        items, cursor = _changes(database, since, limit)
+        if not items:
+            return ids, cursor
+        ids += [item["id"] for item in items]
+        since = cursor
+
+
+def test_feed_delivers_every_version_once(voicemails):
+    ids, cursor = _drain(voicemails)
+    assert ids == [f"vm-{i}" for i in range(5)]
+    assert _changes(voicemails, cursor) == ([], cursor)
+
+    _write(voicemails, "vm-1", START + timedelta(seconds=10))
+    assert _drain(voicemails, cursor)[0] == ["vm-1"]
+
+
+def test_late_commit_behind_the_cursor_is_delivered(voicemails):
+    _, cursor = _drain(voicemails)
+    # Stamped before the newest change already read, committed after it
+    _write(voicemails, "vm-late", START + timedelta(seconds=2, milliseconds=500))
+    items, cursor = _changes(voicemails, cursor)
+    assert [item["id"] for item in items] == ["vm-late"]
+    assert _changes(voicemails, cursor) == ([], cursor)
+
+
+def test_late_commit_behind_the_head_is_delivered(voicemails):
+    head = asyncio.run(async_db.get_change_head())
+    assert _changes(voicemails, head) == ([], head)
+    _write(voicemails, "vm-late", START + timedelta(seconds=3, milliseconds=500))
+    assert [item["id"] for item in _changes(voicemails, head)[0]] == ["vm-late"]
+
+
+def test_burst_keeps_the_cursor_small(voicemails):
+    burst = START + timedelta(seconds=5)
+    with voicemails.begin() as conn:
+        conn.execute(insert(Voicemail), [
+            {"id": f"vm-burst-{i:03d}", "status": "PROCESSING", "created_at": START, "updated_at": burst + timedelta(milliseconds=i)}
+            for i in range(CHANGE_FEED_MAX_SEEN * 2)
+        ])
+    ids, cursor = _drain(voicemails, limit=50)
+    assert len(ids) == len(set(ids)) == 5 + CHANGE_FEED_MAX_SEEN * 2
+    assert len(decode_change_cursor(cursor)[2]) == CHANGE_FEED_MAX_SEEN
+    # Late commits among the versions the cursor still remembers come through
+    _write(voicemails, "vm-late", burst + timedelta(milliseconds=CHANGE_FEED_MAX_SEEN * 2 - 10, microseconds=500))
+    assert _drain(voicemails, cursor)[0] == ["vm-late"]
+
+
+def test_bulk_write_with_one_timestamp_is_delivered_in_full(voicemails):
+    # Bulk updates stamp every row with the same updated_at
+    with voicemails.begin() as conn:
+        conn.execute(update(Voicemail).values(updated_at=START + timedelta(seconds=5)))
+        conn.execute(insert(Voicemail), [
+            {"id": f"vm-bulk-{i:03d}", "status": "PROCESSING", "created_at": START, "updated_at": START + timedelta(seconds=5)}
+            for i in range(CHANGE_FEED_MAX_SEEN * 3)
+        ])
+    ids, _ = _drain(voicemails, limit=40)
+    assert len(ids) == len(set(ids)) == 5 + CHANGE_FEED_MAX_SEEN * 3
+
+
+def test_invalid_cursor_is_rejected(voicemails):
+    with pytest.raises(ValueError):
+        _changes(voicemails, "not-a-cursor")
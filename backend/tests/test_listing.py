@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import delete, insert
+
+from app.db.storage import LIST_SORTS, _list_page, _list_query
+from app.models.voicemail import Voicemail
+
+URGENCIES = ["RED", "NEED_VALIDATION", "YELLOW", "GREEN", None]
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture(scope="module")
+def voicemails(database):
+    # Pairs of rows share created_at, so the id tie-break is exercised too
+    rows = [
+        {
+            "id": f"vm-{i:03d}",
+            "status": "COMPLETED",
+            "urgency": URGENCIES[i % len(URGENCIES)],
+            "created_at": START + timedelta(minutes=i // 2),
+            "updated_at": START,
+        }
+        for i in range(60)
+    ]
+    with database.begin() as conn:
+        conn.execute(delete(Voicemail))
+        conn.execute(insert(Voicemail), rows)
+    return rows
+
+
+def _pages(database, sort, limit=7, **filters):
+    pages, cursor = [], None
+    with database.connect() as conn:
+        while True:
+            rows = list(conn.execute(_list_query(cursor=cursor, limit=limit, sort=sort, **filters)))
+            items, cursor = _list_page(rows, limit, sort)
+            pages.append(items)
+            if cursor is None:
+                return pages
+
+
+def _priority_key(row):
+    return (URGENCIES.index(row["urgency"]), -row["created_at"].timestamp(), [-ord(c) for c in row["id"]])
+
+
+@pytest.mark.parametrize("sort, key, reverse", [
+    ("priority", _priority_key, False),
+    ("priority_asc", _priority_key, True),
+    ("newest", lambda row: (row["created_at"], row["id"]), True),
+    ("oldest", lambda row: (row["created_at"], row["id"]), False),
+])
+def test_pages_walk_the_whole_order_once(database, voicemails, sort, key, reverse):
+    pages = _pages(database, sort)
+    ids = [item["id"] for page in pages for item in page]
+    assert ids == [row["id"] for row in sorted(voicemails, key=key, reverse=reverse)]
+    assert all(len(page) == 7 for page in pages[:-1])
+
+
+def test_priority_puts_validation_between_red_and_yellow(database, voicemails):
+    urgencies = [item["urgency"] for page in _pages(database, "priority") for item in page]
+    tiers = [urgency for position, urgency in enumerate(urgencies) if position == 0 or urgencies[position - 1] != urgency]
+    assert tiers == URGENCIES
+
+
+def test_filtered_pages(database, voicemails):
+    ids = [item["id"] for page in _pages(database, "priority", urgency="YELLOW") for item in page]
+    expected = [row["id"] for row in voicemails if row["urgency"] == "YELLOW"]
+    assert ids == sorted(expected, reverse=True)
+
+
+@pytest.mark.parametrize("sort", sorted(LIST_SORTS))
+def test_next_page_seeks_instead_of_scanning(database, voicemails, sort):
+    # The cursor must bound an index range (SEARCH), not filter a scan from the start
+    _, cursor = _list_page(list(database.connect().execute(_list_query(limit=10, sort=sort))), 10, sort)
+    query = _list_query(cursor=cursor, limit=10, sort=sort).compile(database)
+    with database.connect() as conn:
+        # SQLite plans before binding, so the parameter values don't matter
+        plan = [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {query}", (None,) * len(query.positiontup))]
+    assert any(step.startswith("SEARCH voicemails USING INDEX") for step in plan), plan
+    assert not any("TEMP B-TREE" in step for step in plan), plan
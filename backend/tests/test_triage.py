@@ -0,0 +1,41 @@
+import pytest
+
+from app.services.triage import find_red_flags, provisional_urgency
+
+
+@pytest.mark.parametrize("transcript", [
+    "I don't have chest pain anymore",
+    "I don’t have chest pain anymore",
+    "I dont have chest pain anymore",
+    "He didn't have trouble breathing, he just felt dizzy",
+    "She doesn't have chest pain today",
+    "She doesn’t have a stiff neck",
+    "It isn't a seizure, just a tremor",
+    "He wasn't unconscious",
+    "There is no chest pain",
+    "I haven't fainted",
+])
+def test_negated_red_flags_are_ignored(transcript):
+    assert find_red_flags(transcript) == []
+    assert provisional_urgency(transcript)["urgency"] is None
+
+
+@pytest.mark.parametrize("transcript, flags", [
+    ("I have had chest pain since this morning", ["chest pain"]),
+    ("My husband can’t breathe and his lips are blue", ["can't breathe", "lips are blue"]),
+    ("I don't know what's happening, he collapsed", ["collapsed"]),
+])
+def test_red_flags_are_found(transcript, flags):
+    assert find_red_flags(transcript) == flags
+    assert provisional_urgency(transcript)["urgency"] == "RED"
+
+
+@pytest.mark.parametrize("negated, affirmed, flag", [
+    ("She doesn't have chest pain today", "She has chest pain today", "chest pain"),
+    ("He didn't have trouble breathing last night", "He had trouble breathing last night", "trouble breathing"),
+    ("I don't think he passed out", "I think he passed out", "passed out"),
+])
+def test_negation_is_what_clears_the_flag(negated, affirmed, flag):
+    assert provisional_urgency(negated)["urgency"] != "RED"
+    assert find_red_flags(affirmed) == [flag]
+    assert provisional_urgency(affirmed)["urgency"] == "RED"
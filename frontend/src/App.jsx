@@ -1,11 +1,13 @@
 import { useState, useRef } from 'react'
-import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query'
+import { useMutation, useQueryClient } from '@tanstack/react-query'
 import axios from 'axios'
 import { Mic, Square, Play, AlertTriangle, CheckCircle, Clock, Activity, Loader2 } from 'lucide-react'
 import clsx from 'clsx'
 import { BrowserRouter as Router, Routes, Route } from 'react-router-dom'
 import { Navbar } from './components/Navbar'
 import { Dashboard } from './components/Dashboard'
+import { useVoicemailStream } from './hooks/useVoicemailStream'
+import { useVoicemailList } from './hooks/useVoicemailList'
 
 const API_URL = (import.meta.env.VITE_API_URL || 'http://localhost:8000').replace(/\/$/, '')
 
@@ -29,24 +31,41 @@ function RecordingView() {
     const chunksRef = useRef([])
     const queryClient = useQueryClient()
 
-    const { data: voicemails, isLoading } = useQuery({
-        queryKey: ['voicemails'],
-        queryFn: async () => {
-            const { data } = await axios.get(`${API_URL}/api/voicemails`)
-            return data
-        },
+    // Triage order, paged by the server. Status changes arrive over SSE; poll
+    // in-flight items slowly while it's up and quickly while it's down.
+    const streaming = useVoicemailStream()
+    const { voicemails, isLoading, hasNextPage, fetchNextPage, isFetchingNextPage } = useVoicemailList('priority', {
         refetchInterval: (query) => {
-            const data = query.state.data
-            if (Array.isArray(data) && data.some(item => item.status === 'PROCESSING')) return 2000
+            const pages = query.state.data?.pages ?? []
+            if (pages.some(page => page.items.some(item => item.status === 'PROCESSING'))) return streaming ? 30000 : 2000
             return false
         }
     })
 
     const uploadMutation = useMutation({
         mutationFn: async (audioBlob) => {
-            const formData = new FormData()
-            formData.append("file", audioBlob, "voicemail.wav")
-            return axios.post(`${API_URL}/api/voicemails`, formData)
+            // Audio goes straight to storage on presigned URLs; the API only sees metadata
+            const { data: upload } = await axios.post(`${API_URL}/api/voicemails/uploads`, {
+                filename: 'voicemail.wav',
+                size: audioBlob.size,
+                content_type: 'audio/wav',
+            })
+            let parts = null
+            if (upload.method === 'PUT') {
+                await axios.put(upload.url, audioBlob, { headers: upload.headers })
+            } else {
+                // Part ETags are read from the response (the bucket CORS must expose ETag)
+                parts = await Promise.all(upload.parts.map(async ({ part_number, url }) => {
+                    const start = (part_number - 1) * upload.part_size
+                    const response = await axios.put(url, audioBlob.slice(start, start + upload.part_size))
+                    return { part_number, etag: response.headers.etag }
+                }))
+            }
+            return axios.post(`${API_URL}/api/voicemails/uploads/${upload.id}/complete`, {
+                key: upload.key,
+                upload_id: upload.upload_id,
+                parts,
+            })
         },
         onSuccess: () => {
             queryClient.invalidateQueries({ queryKey: ['voicemails'] })
@@ -124,6 +143,15 @@ function RecordingView() {
                 ) : voicemails?.map((vm) => (
                     <VoicemailCard key={vm.id} vm={vm} />
                 ))}
+                {hasNextPage && (
+                    <button
+                        onClick={() => fetchNextPage()}
+                        disabled={isFetchingNextPage}
+                        className="py-3 text-sm font-medium text-brand-plum hover:bg-brand-brown/5 rounded-lg transition-colors disabled:opacity-50"
+                    >
+                        {isFetchingNextPage ? <Loader2 className="w-4 h-4 animate-spin mx-auto" /> : 'Load more'}
+                    </button>
+                )}
             </div>
         </div>
     )
@@ -171,10 +199,10 @@ function VoicemailCard({ vm }) {
 
                     <p className="text-brand-plum mb-4 font-medium leading-relaxed">
                         {/* We hide the full transcript per user request, only show summary or placeholder */}
-                        {vm.status === 'FAILED' || (vm.status === 'COMPLETED' && !vm.transcript) ? (
+                        {vm.status === 'FAILED' || (vm.status === 'COMPLETED' && !vm.has_transcript) ? (
                             <span className="text-red-500 font-bold">Extraction Failed</span>
                         ) : (
-                            vm.analysis?.summary || <span className="text-brand-brown/40 italic">Processing analysis...</span>
+                            vm.summary || <span className="text-brand-brown/40 italic">Processing analysis...</span>
                         )}
                     </p>
 
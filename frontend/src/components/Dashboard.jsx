@@ -4,26 +4,38 @@ import { useState, useEffect } from 'react'
 import { AlertCircle, CheckCircle, Clock, Loader2, Search, ArrowUpDown } from 'lucide-react'
 import { VoicemailDetail } from './VoicemailDetail'
 import clsx from 'clsx'
+import { useVoicemailStream } from '../hooks/useVoicemailStream'
+import { useVoicemailList, SORT_OPTIONS } from '../hooks/useVoicemailList'
 
 const API_URL = (import.meta.env.VITE_API_URL || 'http://localhost:8000').replace(/\/$/, '')
 
 export function Dashboard() {
-    const [selectedVoicemail, setSelectedVoicemail] = useState(null)
-    const [sortBy, setSortBy] = useState('time_desc')
+    const [selectedId, setSelectedId] = useState(null)
+    const [sortBy, setSortBy] = useState('newest')
 
-    const { data: voicemails, isLoading } = useQuery({
-        queryKey: ['voicemails'],
+    const streaming = useVoicemailStream()
+    // Sorted and paged by the server; "Load more" follows next_cursor
+    const { voicemails, isLoading, hasNextPage, fetchNextPage, isFetchingNextPage } = useVoicemailList(sortBy, {
+        // Live updates arrive over SSE; polling is a safety net while it's up
+        // (cheap 304s via ETag) and the update path while it's down
+        refetchInterval: streaming ? 60000 : 5000
+    })
+
+    // The list only carries summaries; the full record (transcript, analysis) is
+    // fetched for the selected item. Keyed under 'voicemails' so SSE invalidation refreshes it too.
+    const { data: selectedVoicemail, isLoading: isDetailLoading } = useQuery({
+        queryKey: ['voicemails', selectedId],
         queryFn: async () => {
-            const { data } = await axios.get(`${API_URL}/api/voicemails`)
+            const { data } = await axios.get(`${API_URL}/api/voicemails/${selectedId}`)
             return data
         },
-        refetchInterval: 5000
+        enabled: Boolean(selectedId)
     })
 
     // Auto-select first item if none selected and data loaded
     useEffect(() => {
-        if (!selectedVoicemail && voicemails?.length > 0) {
-            setSelectedVoicemail(voicemails[0])
+        if (!selectedId && voicemails?.length > 0) {
+            setSelectedId(voicemails[0].id)
         }
     }, [voicemails])
 
@@ -41,20 +53,6 @@ export function Dashboard() {
         )
     }
 
-    // Sorting Logic
-    const sortedVoicemails = [...(voicemails || [])].sort((a, b) => {
-        if (sortBy === 'time_desc') return new Date(b.created_at) - new Date(a.created_at)
-        if (sortBy === 'time_asc') return new Date(a.created_at) - new Date(b.created_at)
-
-        if (sortBy.startsWith('priority')) {
-            const urgencyOrder = { RED: 0, NEED_VALIDATION: 1, YELLOW: 2, GREEN: 3, null: 4 }
-            const uA = urgencyOrder[a.urgency] ?? 4
-            const uB = urgencyOrder[b.urgency] ?? 4
-            return sortBy === 'priority_desc' ? uA - uB : uB - uA
-        }
-        return 0
-    })
-
     return (
         <div className="flex flex-col h-full md:h-[calc(100vh-140px)]">
             <div className="flex flex-col md:flex-row justify-between items-start md:items-center mb-6 gap-4 shrink-0">
@@ -78,10 +76,9 @@ export function Dashboard() {
                         onChange={(e) => setSortBy(e.target.value)}
                         className="w-full sm:w-auto bg-white/50 border border-brand-brown/20 rounded-lg px-4 py-2 text-sm text-brand-plum focus:outline-none focus:border-brand-plum/50 appearance-none cursor-pointer font-medium"
                     >
-                        <option value="time_desc">Newest First</option>
-                        <option value="time_asc">Oldest First</option>
-                        <option value="priority_desc">Priority (Critical First)</option>
-                        <option value="priority_asc">Priority (Safe First)</option>
+                        {SORT_OPTIONS.map(({ value, label }) => (
+                            <option key={value} value={value}>{label}</option>
+                        ))}
                     </select>
                 </div>
             </div>
@@ -92,7 +89,7 @@ export function Dashboard() {
                     "glass-panel overflow-hidden flex flex-col transition-all duration-300",
                     // Mobile: Hide if item selected (detail view active)
                     // Desktop: Always show as col-span-4
-                    selectedVoicemail ? "hidden lg:flex lg:col-span-4" : "flex flex-1 lg:col-span-4",
+                    selectedId ? "hidden lg:flex lg:col-span-4" : "flex flex-1 lg:col-span-4",
                     // Height adjustments
                     "h-full lg:h-auto"
                 )}>
@@ -113,13 +110,13 @@ export function Dashboard() {
                                             Loading...
                                         </td>
                                     </tr>
-                                ) : sortedVoicemails.map((vm) => (
+                                ) : voicemails?.map((vm) => (
                                     <tr
                                         key={vm.id}
-                                        onClick={() => setSelectedVoicemail(vm)}
+                                        onClick={() => setSelectedId(vm.id)}
                                         className={clsx(
                                             "cursor-pointer transition-colors group border-l-4",
-                                            selectedVoicemail?.id === vm.id
+                                            selectedId === vm.id
                                                 ? "bg-brand-yellow/20 border-l-brand-plum"
                                                 : "hover:bg-brand-brown/5 border-l-transparent"
                                         )}
@@ -129,10 +126,10 @@ export function Dashboard() {
                                         </td>
                                         <td className="p-4 align-top">
                                             <div className="font-medium line-clamp-2 text-sm">
-                                                {vm.status === 'FAILED' || (vm.status === 'COMPLETED' && !vm.transcript) ? (
+                                                {vm.status === 'FAILED' || (vm.status === 'COMPLETED' && !vm.has_transcript) ? (
                                                     <span className="text-red-500 font-bold">Extraction Failed</span>
                                                 ) : (
-                                                    vm.analysis?.summary || <span className="text-brand-brown/60 italic">Processing...</span>
+                                                    vm.summary || <span className="text-brand-brown/60 italic">Processing...</span>
                                                 )}
                                             </div>
                                             {vm.status === 'PROCESSING' && (
@@ -152,20 +149,36 @@ export function Dashboard() {
                                 ))}
                             </tbody>
                         </table>
+                        {hasNextPage && (
+                            <button
+                                onClick={() => fetchNextPage()}
+                                disabled={isFetchingNextPage}
+                                className="w-full p-4 text-sm font-medium text-brand-plum hover:bg-brand-brown/5 transition-colors disabled:opacity-50"
+                            >
+                                {isFetchingNextPage ? <Loader2 className="w-4 h-4 animate-spin mx-auto" /> : 'Load more'}
+                            </button>
+                        )}
                     </div>
                 </div>
 
                 {/* Right Panel: Detail */}
                 <div className={clsx(
                     // Mobile: Fixed overlay if selected, else hidden
-                    selectedVoicemail ? "fixed inset-0 z-50 p-4 bg-white/95 lg:static lg:p-0 lg:bg-transparent lg:block lg:col-span-8" : "hidden lg:block lg:col-span-8",
+                    selectedId ? "fixed inset-0 z-50 p-4 bg-white/95 lg:static lg:p-0 lg:bg-transparent lg:block lg:col-span-8" : "hidden lg:block lg:col-span-8",
                     "h-full min-h-0"
                 )}>
-                    <VoicemailDetail
-                        vm={selectedVoicemail}
-                        onClose={() => setSelectedVoicemail(null)}
-                        className="h-full shadow-2xl lg:shadow-xl"
-                    />
+                    {selectedId && isDetailLoading ? (
+                        <div className="p-8 text-center text-brand-brown">
+                            <Loader2 className="w-6 h-6 animate-spin mx-auto mb-2 opacity-50" />
+                            Loading...
+                        </div>
+                    ) : (
+                        <VoicemailDetail
+                            vm={selectedVoicemail}
+                            onClose={() => setSelectedId(null)}
+                            className="h-full shadow-2xl lg:shadow-xl"
+                        />
+                    )}
                 </div>
             </div>
         </div>
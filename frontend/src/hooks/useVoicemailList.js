@@ -0,0 +1,32 @@
+import { useInfiniteQuery } from '@tanstack/react-query'
+import axios from 'axios'
+
+const API_URL = (import.meta.env.VITE_API_URL || 'http://localhost:8000').replace(/\/$/, '')
+
+// Orders the server can page through (GET /api/voicemails?sort=). Ordering,
+// including where each urgency ranks, is decided server-side only.
+export const SORT_OPTIONS = [
+    { value: 'newest', label: 'Newest First' },
+    { value: 'oldest', label: 'Oldest First' },
+    { value: 'priority', label: 'Priority (Critical First)' },
+    { value: 'priority_asc', label: 'Priority (Safe First)' },
+]
+
+// Keyset-paginated voicemail summaries: pages are appended by following
+// `next_cursor`, so nothing past the first page is silently dropped.
+export function useVoicemailList(sort, options = {}) {
+    const query = useInfiniteQuery({
+        queryKey: ['voicemails', 'list', sort],
+        queryFn: async ({ pageParam }) => {
+            const { data } = await axios.get(`${API_URL}/api/voicemails`, {
+                params: { sort, ...(pageParam ? { cursor: pageParam } : {}) }
+            })
+            return data
+        },
+        initialPageParam: null,
+        getNextPageParam: (lastPage) => lastPage.next_cursor ?? undefined,
+        ...options
+    })
+    const voicemails = query.data?.pages.flatMap(page => page.items)
+    return { ...query, voicemails }
+}
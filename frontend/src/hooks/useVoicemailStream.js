@@ -0,0 +1,45 @@
+import { useEffect, useState } from 'react'
+import { useQueryClient } from '@tanstack/react-query'
+import axios from 'axios'
+
+const API_URL = (import.meta.env.VITE_API_URL || 'http://localhost:8000').replace(/\/$/, '')
+
+// Subscribes to backend status pushes (SSE) and refreshes the voicemail list
+// only when something actually changed, instead of polling on a timer.
+// Returns whether the stream is up, so callers can fall back to polling.
+export function useVoicemailStream() {
+    const queryClient = useQueryClient()
+    const [connected, setConnected] = useState(false)
+
+    useEffect(() => {
+        const source = new EventSource(`${API_URL}/api/voicemails/stream`)
+        let reconnect = false
+        let cursor = null
+        const refresh = () => queryClient.invalidateQueries({ queryKey: ['voicemails'] })
+
+        // Every (re)connect starts with the change-feed head. After a drop, ask the
+        // feed whether anything was written since the last head we saw.
+        source.addEventListener('ready', async (event) => {
+            const previous = cursor
+            cursor = JSON.parse(event.data).cursor
+            setConnected(true)
+            if (!reconnect) {
+                reconnect = true
+                return
+            }
+            try {
+                const { data } = await axios.get(`${API_URL}/api/voicemails/changes`, {
+                    params: { ...(previous ? { since: previous } : {}), limit: 1 }
+                })
+                if (data.items.length) refresh()
+            } catch {
+                refresh()
+            }
+        })
+        source.addEventListener('voicemail', refresh)
+        source.onerror = () => setConnected(false)
+        return () => source.close()
+    }, [queryClient])
+
+    return connected
+}